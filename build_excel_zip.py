@@ -1,12 +1,11 @@
 import argparse
 import json
-import subprocess
-import tempfile
+import os
 from pathlib import Path
-from zipfile import ZipFile
 from extractor import TablesExtractor
 from repacker import TableRepackerImpl
 from lib.encryption import zip_password
+from utils.util import ZipUtils
 import shutil
 from collections import defaultdict
 
@@ -77,33 +76,26 @@ def main(excel_input_path: Path, repl_input_dir: Path, output_filepath: Path) ->
     import setup_flatdata
     packer = TableRepackerImpl('Extracted.FlatData')
     source_dir = Path(f'Extracted/Table/{excel_input_path.stem}')
-    source_binary_dir = Path(f'Extracted/Temp/Table/{excel_input_path.stem}')
     if not source_dir.exists():
         print("Extracting source zip JSONs...")
         TablesExtractor('Extracted', excel_input_path.parent).extract_table(excel_input_path.name)
-    if not source_binary_dir.exists():
-        print("Extracting source zip binaries...")
-        source_binary_dir.mkdir(parents=True, exist_ok=True)
-        with ZipFile(excel_input_path, "r") as excel_zip:
-            excel_zip.setpassword(zip_password("Excel.zip"))
-            excel_zip.extractall(path=source_binary_dir)
-    with tempfile.TemporaryDirectory() as temp_extract_dir:
-        temp_extract_path = Path(temp_extract_dir)
-        shutil.copytree(source_binary_dir, temp_extract_dir, dirs_exist_ok=True)
-        print("Applying replacements...")
-        for file in source_dir.iterdir():
-            target_file = temp_extract_path / f"{file.stem.lower()}.bytes"
-            repl_file = repl_input_dir / file.name
-            if repl_file.exists():
-                out_file = apply_replacements(file, repl_file)
-                new_content = packer.repackExcelZipJson(out_file)
-                if out_file.exists():
-                    out_file.unlink()
-                with open(target_file, "wb") as tf:
-                    tf.write(new_content)
-        password_str = zip_password("Excel.zip").decode()
-        cmd = ["zip", "-r", "-X", "-9", "-P", password_str, str(output_filepath.resolve()), "."]
-        subprocess.run(cmd, cwd=temp_extract_path, check=True)
+    print("Applying replacements...")
+    replacements = {}
+    for file in source_dir.iterdir():
+        repl_file = repl_input_dir / file.name
+        if repl_file.exists():
+            out_file = apply_replacements(file, repl_file)
+            replacements[f"{file.stem.lower()}.bytes"] = packer.repackExcelZipJson(out_file)
+            if out_file.exists():
+                out_file.unlink()
+    # Untouched tables are copied from the source zip as they are, only the replaced ones are recompressed.
+    ZipUtils.rebuild_zip(
+        str(excel_input_path),
+        str(output_filepath),
+        replacements,
+        zip_password("Excel.zip"),
+        os.cpu_count() or 1,
+    )
     temp_dir = source_dir / "temp"
     if temp_dir.exists():
         shutil.rmtree(temp_dir)
@@ -6,12 +6,13 @@ import os
 import time
 from multiprocessing import Queue, freeze_support
 from os import path
+from typing import Literal
 
-from lib.compiler import CompileToPython, CSParser
+from lib.compiler import CompileToPython, CSParser, FlatDataBundle
 from lib.console import ProgressBar, bar_increase, bar_text, notice
 from utils.util import TaskManager
 from xtractor.bundle import BundleExtractor
-from xtractor.table import TableExtractor
+from xtractor.table import FlatDataIndex, TableExtractor
 import importlib
 from lib.encryption import xor_with_key
 from utils.config import Config
@@ -79,32 +80,83 @@ class TablesExtractor(TableExtractor):
                 e_task.import_tasks(table_files)
                 e_task.run(e_task)
 
-def compile_python(DUMP_CS_FILE_PATH, EXTRACT_DIR) -> None:
-    """Compile python callable module from dump file"""
+def compile_python(DUMP_CS_FILE_PATH, EXTRACT_DIR, dump_mode: Literal["accessor", "direct"] = "accessor", bundle: bool = False) -> None:
+    """Compile python callable module from dump file.
+
+    Args:
+        DUMP_CS_FILE_PATH (str): Path of dump.cs.
+        EXTRACT_DIR (str): Dir to generate FlatData in.
+        dump_mode (str, optional): "accessor" dumps through the FlatData accessors, "direct" generates decoders reading field offsets from the buffer. Defaults to "accessor".
+        bundle (bool, optional): Also compile FlatData to a single bytecode zip in EXTRACT_DIR, loaded by the extractors without compiling sources. Defaults to False.
+
+    FlatData/manifest.json keeps a hash of each generated definition, so a later run only rewrites
+    what changed. Its "changes" lists the tables whose schema was added, removed or changed since
+    the previous run.
+    """
+    timings: list[tuple[str, float]] = []
+
+    def timed(phase: str, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append((phase, time.perf_counter() - start))
+        return result
+
     print("Parsing dump.cs...")
-    parser = CSParser(DUMP_CS_FILE_PATH)
+    parser = timed("parse dump.cs", CSParser, DUMP_CS_FILE_PATH)
     enums = parser.parse_enum()
     structs = parser.parse_struct()
     
     print("Generating flatbuffer python dump files...")
-    compiler = CompileToPython(enums, structs, path.join(EXTRACT_DIR, "FlatData"))
-    compiler.create_enum_files()
-    compiler.create_struct_files()
-    compiler.create_module_file()
-    compiler.create_dump_dict_file()
-    compiler.create_repack_dict_file()
+    compiler = timed("resolve types", CompileToPython, enums, structs, path.join(EXTRACT_DIR, "FlatData"))
+    # Only modules whose definition changed since the last generation are written.
+    manifest = compiler.load_manifest()
+    stale = compiler.stale_modules(manifest)
+    removed = compiler.remove_modules(manifest)
+    timed("enum files", compiler.create_enum_files, stale)
+    timed("struct files", compiler.create_struct_files, stale)
+    print(f"Wrote {len(stale)} of {len(enums) + len(structs)} FlatData modules, removed {len(removed)}.")
+
+    # Wrappers cover every type, rewrite them if anything changed.
+    rewrite = bool(stale or removed) or manifest.get("dump_mode") != dump_mode or not compiler.wrappers_exist()
+    if rewrite:
+        timed("module file", compiler.create_module_file)
+        if dump_mode == "direct":
+            timed("dump wrapper", compiler.create_direct_dump_dict_file)
+        else:
+            timed("dump wrapper", compiler.create_dump_dict_file)
+        timed("repack wrapper", compiler.create_repack_dict_file)
+        timed("schema", compiler.create_schema_file)
+        # A bundle of the previous sources would shadow the new ones.
+        if not bundle:
+            FlatDataBundle.remove(EXTRACT_DIR)
+
+    changes = timed("table schemas", compiler.table_changes, manifest)
+    compiler.save_manifest(dump_mode, changes)
+    if manifest:
+        for change, tables in changes.items():
+            if len(tables) > 10:
+                print(f"Schema {change}: {len(tables)} tables, listed in {compiler.MANIFEST_NAME}.")
+            elif tables:
+                print(f"Schema {change}: {', '.join(tables)}")
+    
+    if bundle and (rewrite or not FlatDataBundle.find_current(EXTRACT_DIR)):
+        print("Compiling FlatData bundle...")
+        print(f"Generated FlatData bundle: {timed('bundle', FlatDataBundle.build, EXTRACT_DIR)}")
+
+    print("Compile timings:")
+    for phase, seconds in timings:
+        print(f"  {phase:<16}{seconds:>8.3f}s")
+    print(f"  {'total':<16}{sum(seconds for _, seconds in timings):>8.3f}s")
 
 class TableExtractorImpl:
     def __init__(self, flat_data_module_name):
         try:
+            FlatDataBundle.load(flat_data_module_name.rpartition(".")[0].replace(".", os.sep))
             flat_data_lib = importlib.import_module(flat_data_module_name)
             self.dump_wrapper_lib = importlib.import_module(
                 f"{flat_data_module_name}.dump_wrapper"
             )
-            self.lower_fb_name_modules = {
-            t_name.lower(): t_class
-            for t_name, t_class in flat_data_lib.__dict__.items()
-            }
+            self.lower_fb_name_modules = FlatDataIndex(flat_data_lib)
         except Exception as e:
             notice(
                 f"Cannot import FlatData module. Make sure FlatData is available in Extracted folder. {e}",
@@ -1,11 +1,23 @@
 """Compiler will parse CSharp dump file to convert to python callable code."""
 
+import glob
+import hashlib
+import importlib
+import inspect
+import json
+import marshal
 import os
 import re
+import sys
+from contextlib import nullcontext
 from enum import Enum
+from importlib.util import MAGIC_NUMBER, source_hash
+from typing import Iterable, Iterator
+from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo
 
-from lib.structure import EnumMember, EnumType, Property, StructTable
+from lib.structure import EnumMember, EnumType, Property, ResolvedType, StructTable, TypeKind
 from lib.console import notice
+from lib.encryption import create_key
 from utils.util import TemplateString, Utils
 
 
@@ -52,6 +64,37 @@ class ConvertFlag(Enum):
     string = "convert_string"
 
 
+class ArrayConvertFlag(Enum):
+    short = "convert_short_array"
+    ushort = "convert_ushort_array"
+    int = "convert_int_array"
+    uint = "convert_uint_array"
+    long = "convert_long_array"
+    ulong = "convert_ulong_array"
+    float = "convert_float_array"
+    double = "convert_double_array"
+
+
+class MaskedConvertFlag(Enum):
+    float = "convert_float_masked"
+    double = "convert_double_masked"
+
+
+class NumpyFormat(Enum):
+    bool = "?"
+    byte = "i1"
+    sbyte = "i1"
+    ubyte = "u1"
+    short = "<i2"
+    ushort = "<u2"
+    int = "<i4"
+    uint = "<u4"
+    long = "<i8"
+    ulong = "<u8"
+    float = "<f4"
+    double = "<f8"
+
+
 class String:
     INDENT = "    "
     NEWLINE = "\n"
@@ -66,18 +109,22 @@ class String:
     """Basic function structure.\n\nArgs: func_name, args, annotaion"""
 
     WRAPPER_BASE = """from enum import IntEnum
-from lib.encryption import convert_short, convert_ushort, convert_int, convert_long, convert_float, convert_double, convert_string, convert_uint, convert_ulong, create_key
-import inspect\n
+from lib.encryption import NO_MASKS, XorMasks, convert_float_masked, convert_double_masked, convert_string
+from lib.encryption import convert_short_array, convert_ushort_array, convert_int_array, convert_uint_array, convert_long_array, convert_ulong_array, convert_float_array, convert_double_array
+from lib.flatbuffer import RecordView
+\n
 def dump_table(table_instance) -> list:
-    excel_name = table_instance.__class__.__name__.removesuffix("Table")
-    current_module = inspect.getmodule(inspect.currentframe())
-    dump_func = next(
-        f
-        for n, f in inspect.getmembers(current_module, inspect.isfunction)
-        if n.removeprefix("dump_") == excel_name
-    )
-    password = create_key(excel_name.removesuffix("Excel"))
-    return [dump_func(table_instance.DataList(j), password) for j in range(table_instance.DataListLength())]\n
+    dump_func, _, password = DUMP_TABLES[table_instance.__class__.__name__]
+    masks = XorMasks.from_key(password)
+    # Records are dumped to dicts right away, so one instance is reused for all of them.
+    return [dump_func(record, masks.key, masks) for record in table_instance.DataListIter()]\n
+def view_table(table_instance) -> list:
+    _, view_class, password = DUMP_TABLES[table_instance.__class__.__name__]
+    masks = XorMasks.from_key(password)
+    return [view_class(table_instance.DataList(j), masks.key, masks) for j in range(table_instance.DataListLength())]\n
+def view_record(excel_instance, password: bytes = b"") -> RecordView:
+    view_class = DUMP_TABLES[excel_instance.__class__.__name__ + "Table"][1]
+    return view_class(excel_instance, password, XorMasks.from_key(password) if password else NO_MASKS)\n
 """
     """Wrapper basic structure."""
 
@@ -88,44 +135,231 @@ def dump_table(table_instance) -> list:
     """Wrap call FlatData list method.\n\nArgs: prop_name"""
 
     WRAPPER_LIST_CONVERTION = TemplateString(
-        "%s for j in range(excel_instance.%sLength())"
+        "[%s for j in range(excel_instance.%sLength())]"
     )
     """Wrap list prop.\n\nArgs: convertion|getter, prop_name"""
 
+    WRAPPER_ARRAY_CONVERTION = TemplateString(
+        "%s(excel_instance.%sAsNumpy(), password)"
+    )
+    """Wrap scalar list prop decrypted at once, kept as a NumPy array until serialized.\n\nArgs: array_convert_method, prop_name"""
+
+    WRAPPER_ENUM_ARRAY_CONVERTION = TemplateString("[%s_NAMES[v] for v in %s.tolist()]")
+    """Wrap enum list prop decrypted at once.\n\nArgs: enum_name, array_convertion"""
+
     WRAPPER_PASSWD_CONVERTION = TemplateString("%s(%s, password)")
     """Wrap the data has password.\n\nArgs: type_convert_method, getter"""
 
-    WRAPPER_ENUM_CONVERTION = TemplateString("%s(%s).name")
+    WRAPPER_MASK_CONVERTION = TemplateString("%s ^ masks.%s")
+    """Wrap integer data XOR with the mask of its type.\n\nArgs: getter, data_type"""
+
+    WRAPPER_MASKS_CONVERTION = TemplateString("%s(%s, masks)")
+    """Wrap the data converted with masks.\n\nArgs: type_convert_method, getter"""
+
+    WRAPPER_STRUCT_CONVERTION = TemplateString("dump_%s(%s, password, masks)")
+    """Wrap prop of struct type.\n\nArgs: struct_name, getter"""
+
+    WRAPPER_OPTIONAL_STRUCT_CONVERTION = TemplateString(
+        "None if (nested := %s) is None else dump_%s(nested, password, masks)"
+    )
+    """Wrap prop of struct type read by a view, None when absent like the direct decoders.\n\nArgs: getter, struct_name"""
+
+    WRAPPER_STRUCT_LIST_CONVERTION = TemplateString(
+        "[dump_%s(item, password, masks) for item in excel_instance.%sIter()]"
+    )
+    """Wrap list prop of struct type, dumped through one reused instance.\n\nArgs: struct_name, prop_name"""
+
+    WRAPPER_ENUM_CONVERTION = TemplateString("%s_NAMES[%s]")
     """Wrap prop of enum type.\n\nArgs: enum_name, convertion"""
 
     WRAPPER_PROP_KV = TemplateString('"%s": %s,\n')
     """Wrap non-list prop.\n\nArgs: prop_name, convertion|getter"""
 
-    WRAPPER_LIST_KV = TemplateString('"%s": [%s],\n')
-    """Wrap list prop.\n\nArgs: prop_name, convertion|getter"""
 
     WRAPPER_FUNC = TemplateString(
         """
-def dump_%s(excel_instance, password: bytes = b"") -> dict:
+def dump_%s(excel_instance, password: bytes = b"", masks: XorMasks | None = None) -> dict:
+    if masks is None:
+        masks = XorMasks.from_key(password)
     return {\n%s    }
 """
     )
     """Wrapper func.\n\nArgs: struct_name, dict_items"""
 
+    DIRECT_WRAPPER_BASE = """from enum import IntEnum
+from lib.encryption import NO_MASKS, XorMasks, convert_float_masked, convert_double_masked, convert_string
+from lib.encryption import convert_short_array, convert_ushort_array, convert_int_array, convert_uint_array, convert_long_array, convert_ulong_array, convert_float_array, convert_double_array
+from lib.flatbuffer import RecordView, indirect, read_array, read_string, read_strings, read_tables, read_vtable
+from lib.flatbuffer import unpack_bool, unpack_byte, unpack_sbyte, unpack_ubyte, unpack_short, unpack_ushort, unpack_int, unpack_uint, unpack_long, unpack_ulong, unpack_float, unpack_double
+\n
+def dump_table(table_instance) -> list:
+    decode_func, _, password = DUMP_TABLES[table_instance.__class__.__name__]
+    masks = XorMasks.from_key(password)
+    buf, pos = table_instance._tab.Bytes, table_instance._tab.Pos
+    (o0,) = read_vtable(buf, pos, 1)
+    return [decode_func(buf, p, masks.key, masks) for p in read_tables(buf, pos + o0)] if o0 else []\n
+def view_table(table_instance) -> list:
+    _, view_class, password = DUMP_TABLES[table_instance.__class__.__name__]
+    masks = XorMasks.from_key(password)
+    buf, pos = table_instance._tab.Bytes, table_instance._tab.Pos
+    (o0,) = read_vtable(buf, pos, 1)
+    count = view_class.VTABLE_SIZE
+    return [view_class(buf, p, read_vtable(buf, p, count), masks.key, masks) for p in read_tables(buf, pos + o0)] if o0 else []\n
+def view_record(excel_instance, password: bytes = b"") -> RecordView:
+    view_class = DUMP_TABLES[excel_instance.__class__.__name__ + "Table"][1]
+    buf, pos = excel_instance._tab.Bytes, excel_instance._tab.Pos
+    offsets = read_vtable(buf, pos, view_class.VTABLE_SIZE)
+    return view_class(buf, pos, offsets, password, XorMasks.from_key(password) if password else NO_MASKS)\n
+"""
+    """Wrapper basic structure reading the buffer directly."""
+
+    DIRECT_OFFSET = TemplateString("o%d")
+    """Name of a field offset read from the vtable.\n\nArgs: field_index"""
+
+    DIRECT_POSITION = TemplateString("pos + %s")
+    """Absolute position of a field.\n\nArgs: field_offset"""
+
+    DIRECT_FIELD = TemplateString("(%s if %s else %s)")
+    """Read a field or fall back to its default when absent.\n\nArgs: read, field_offset, default"""
+
+    DIRECT_SCALAR = TemplateString("unpack_%s(buf, %s)[0]")
+    """Read a scalar.\n\nArgs: data_type, position"""
+
+    DIRECT_STRING = TemplateString("read_string(buf, %s)")
+    """Read string bytes.\n\nArgs: position"""
+
+    DIRECT_STRUCT = TemplateString("decode_%s(buf, indirect(buf, %s), password, masks)")
+    """Decode a nested struct.\n\nArgs: struct_name, position"""
+
+    DIRECT_ARRAY = TemplateString('read_array(buf, %s, "%s")')
+    """Read a NumPy view of a scalar vector.\n\nArgs: position, numpy_format"""
+
+    DIRECT_ARRAY_CONVERTION = TemplateString("%s(%s, password)")
+    """Decrypt a scalar vector at once, kept as a NumPy array until serialized.\n\nArgs: array_convert_method, array"""
+
+    DIRECT_STRING_LIST = TemplateString(
+        "[convert_string(s, password) for s in read_strings(buf, %s)]"
+    )
+    """Read and decrypt a string vector.\n\nArgs: position"""
+
+    DIRECT_STRUCT_LIST = TemplateString(
+        "[decode_%s(buf, p, password, masks) for p in read_tables(buf, %s)]"
+    )
+    """Decode a vector of structs.\n\nArgs: struct_name, position"""
+
+    DIRECT_WRAPPER_FUNC = TemplateString(
+        """
+def decode_%s(buf, pos: int, password: bytes, masks: XorMasks) -> dict:
+    %s = read_vtable(buf, pos, %d)
+    return {\n%s    }\n
+def dump_%s(excel_instance, password: bytes = b"", masks: XorMasks | None = None) -> dict:
+    if masks is None:
+        masks = XorMasks.from_key(password)
+    return decode_%s(excel_instance._tab.Bytes, excel_instance._tab.Pos, password, masks)
+"""
+    )
+    """Direct decoder and its accessor compatible entry.\n\nArgs: struct_name, field_offsets, field_count, dict_items, struct_name, struct_name"""
+
+    WRAPPER_DUMP_TABLES = TemplateString("\nDUMP_TABLES = {\n%s}\n")
+    """Static dispatch of dump_table.\n\nArgs: table_items"""
+
+    WRAPPER_DUMP_TABLE_ITEM = TemplateString('"%s": (%s, %sView, %r),\n')
+    """Table class name to its record function, view and password.\n\nArgs: table_name, func_name, struct_name, password"""
+
+    WRAPPER_VIEW_ARGS = "excel_instance, password, masks"
+    """View arguments read by accessor convertions."""
+
+    WRAPPER_VIEW_CLASS = TemplateString(
+        """
+class %sView(RecordView):
+    __slots__ = %r
+    FIELDS = %r
+%s%s"""
+    )
+    """Lazy record view.\n\nArgs: struct_name, cache_slots, field_names, class_body, properties"""
+
+    WRAPPER_VIEW_PROPERTY = TemplateString(
+        """
+    @property
+    def %s(self):
+        try:
+            return self._%s
+        except AttributeError:
+            %s = self._args
+%s            value = self._%s = %s
+            return value
+"""
+    )
+    """Field of a view decrypted on first access.\n\nArgs: prop_name, prop_name, view_args, offset_binding, prop_name, convertion"""
+
+    DIRECT_VIEW_ARGS = "buf, pos, offsets, password, masks"
+    """View arguments read by direct convertions."""
+
+    DIRECT_VIEW_OFFSET = TemplateString("            %s = offsets[%d]\n")
+    """Bind the field offset a direct convertion reads.\n\nArgs: field_offset, field_index"""
+
+    DIRECT_VIEW_VTABLE_SIZE = TemplateString("    VTABLE_SIZE = %d\n")
+    """Field count of the vtable read for a view.\n\nArgs: field_count"""
+
     WRAPPER_INT_ENUM = TemplateString("class %s(IntEnum):")
     """Wrapper enum class.\n\nArgs: enum_name"""
 
+    WRAPPER_ENUM_NAMES = TemplateString("%s_NAMES = %r")
+    """Member names of an enum by value.\n\nArgs: enum_name, dict"""
+
+    REPACK_ENUM_VALUES = TemplateString("%s_VALUES = %r")
+    """Values of an enum by member name.\n\nArgs: enum_name, dict"""
+
     # MODULE_IMPORT = TemplateString("from %s import %s")
     # """From module import name.\n\nArgs: module_name, component_name"""
 
-    LOCAL_IMPORT = TemplateString("from .%s import %s")
-    """From .module import name.\n\nArgs: local_module_name, component_name"""
+    LAZY_MODULE = TemplateString(
+        """import importlib
+import sys
+from types import ModuleType
+
+MODULES = (\n%s)
+\"\"\"Enum and struct modules, each defines a class of its name.\"\"\"
+
+LOWER_NAMES = {name.lower(): name for name in MODULES}
+\"\"\"Lowercase name to module name, e.g. "scenarioscriptexceltable".\"\"\"
+
+__all__ = list(MODULES)
+_MODULE_SET = frozenset(MODULES)
+
+
+class _LazyPackage(ModuleType):
+    def __setattr__(self, name, value):
+        # Importing a submodule binds it on the package, keep its class instead.
+        if name in _MODULE_SET and isinstance(value, ModuleType):
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+def __getattr__(name: str):
+    if name not in _MODULE_SET:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    importlib.import_module(f".{name}", __name__)
+    return globals()[name]
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *MODULES})
+
+
+sys.modules[__name__].__class__ = _LazyPackage
+"""
+    )
+    """Package importing a module on first access of its class.\n\nArgs: module_names"""
+
+    LAZY_MODULE_NAME = TemplateString('"%s",\n')
+    """Module name in the package index.\n\nArgs: module_name"""
 
     FB_BASIC_CLASS = TemplateString(
         """
 import flatbuffers
 from flatbuffers.compat import import_numpy
-np = import_numpy()\n
+np = import_numpy()\n%s
 class %s:
     __slots__ = ['_tab']\n
     @classmethod
@@ -138,21 +372,51 @@ class %s:
         self._tab = flatbuffers.table.Table(buf, pos)\n
 """
     )
-    """FlatBuffer basic class.\n\nArgs: struct_name, struct_name"""
+    """FlatBuffer basic class.\n\nArgs: child_classes, struct_name, struct_name"""
+
+    FB_CHILD_CLASS = TemplateString("%s = None\n")
+    """Module global of a nested class, None until first used.\n\nArgs: prop_type"""
+
+    FB_CHILD_CLASSES = TemplateString(
+        """
+# Nested classes are imported on first use, their modules may import this one.
+%s
+"""
+    )
+    """Module globals of nested classes.\n\nArgs: assignments"""
+
+    FB_CHILD_CLASS_IMPORT = TemplateString(
+        """            if %s is None:
+                from .%s import %s
+"""
+    )
+    """Bind a nested class global on first use.\n\nArgs: prop_type, prop_type, prop_type"""
 
     FB_NON_SCALAR_LIST_CLASS_METHODS = TemplateString(
         """
     def %s(self, j):
+        global %s
         o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(%d))
         if o != 0:
             x = self._tab.Vector(o)
             x += flatbuffers.number_types.UOffsetTFlags.py_type(j) * %d
             x = self._tab.Indirect(x)
-            from .%s import %s
-            obj = %s()
+%s            obj = %s()
             obj.Init(self._tab.Bytes, x)
             return obj
         return None\n
+    def %sIter(self):
+        # One instance is repositioned for every element, use it before the next one.
+        global %s
+        o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(%d))
+        if o != 0:
+%s            obj = %s()
+            obj.Init(self._tab.Bytes, 0)
+            tab = obj._tab
+            x = self._tab.Vector(o)
+            for j in range(self._tab.VectorLen(o)):
+                tab.Pos = self._tab.Indirect(x + j * %d)
+                yield obj\n
     def %sLength(self):
         o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(%d))
         if o != 0:
@@ -163,7 +427,7 @@ class %s:
         return o == 0\n
 """
     )
-    """FlatBuffer method for list is a non-scalar type(ptr).\n\nArgs: prop_name, field_index_offset, type_alignment_size, prop_type, prop_type, prop_type, prop_name, field_index_offset, prop_name, field_index_offset"""
+    """FlatBuffer method for list is a non-scalar type(ptr).\n\nArgs: prop_name, prop_type, field_index_offset, type_alignment_size, child_class_import, prop_type, prop_name, prop_type, field_index_offset, child_class_import, prop_type, type_alignment_size, prop_name, field_index_offset, prop_name, field_index_offset"""
 
     FB_SCALAR_LIST_CLASS_METHODS = TemplateString(
         """
@@ -235,31 +499,31 @@ class %s:
     FB_STRUCT_PROPERTY_CLASS_METHODS = TemplateString(
         """
     def %s(self):
+        global %s
         o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(%d))
         if o != 0:
             x = self._tab.Indirect(o + self._tab.Pos)
-            from .%s import %s
-            obj = %s()
+%s            obj = %s()
             obj.Init(self._tab.Bytes, x)
             return obj
         return None\n
 """
     )
-    """FlatBuffer method for struct type property.\n\nArgs: prop_name, field_index_offset, prop_type, prop_type, prop_type"""
+    """FlatBuffer method for struct type property.\n\nArgs: prop_name, prop_type, field_index_offset, child_class_import, prop_type"""
 
     FB_ISOLATED_PROPERTY_CLASS_METHODS = TemplateString(
         """
     def %s(self):
+        global %s
         o = flatbuffers.number_types.UOffsetTFlags.py_type(self._tab.Offset(%d))
         if o != 0:
-            from .%s import %s
-            obj = %s()
+%s            obj = %s()
             obj.Init(self._tab.Bytes, o + self._tab.Pos)
             return obj
         return None\n
 """
     )
-    """FlatBuffer method for non-scalar type property(ptr).\n\nArgs: prop_name, field_index_offset, prop_type, prop_type, prop_type"""
+    """FlatBuffer method for non-scalar type property(ptr).\n\nArgs: prop_name, prop_type, field_index_offset, child_class_import, prop_type"""
 
     FB_LIST_AND_NON_SCALAR_PROPERTY_FUNCTION = TemplateString(
         """
@@ -299,30 +563,18 @@ class %s:
 
 
 class Re:
-    struct = re.compile(
-        r"""\s*struct (.{0,128}?) :.{0,128}?IFlatbufferObject.{0,128}?
-\s*\{
-(.+?)
-\s*\}
-""",
-        re.M | re.S,
-    )
-    """Get structure name and its field."""
+    struct = re.compile(r"struct (.{0,128}?) :.{0,128}?IFlatbufferObject")
+    """Get structure name from its declaration line."""
 
     struct_property = re.compile(r"""public (?:FlatData\.)?(.+?)\?? (.+?) { get(?: => default)?; }""")
     """Get property type and name in field."""
 
-    enum = re.compile(
-        r"""
-public\s+enum\s+(.{1,128}?)\s*//\s*TypeDefIndex:\s*\d+\s*
-\{\s*
-(.*?)
-\s*\}
-        """,
-        re.M | re.S | re.X,
-    )
+    struct_list_method = re.compile(r"public (?:FlatData\.)?(.+?)\?? (\w+)\(int j\) => default;")
+    """Get object type in list and list name from its accessor method."""
+
+    enum = re.compile(r"public\s+enum\s+(.{1,128}?)\s*//\s*TypeDefIndex:\s*\d+")
+    """Get enum name from its declaration line."""
 
-    """Get value, type of enum and enum field."""
     enum_member = re.compile(r"(.+?) = (-?\d+)")
     """Get member name, value in enum."""
 
@@ -330,50 +582,106 @@ public\s+enum\s+(.{1,128}?)\s*//\s*TypeDefIndex:\s*\d+\s*
 
 
 class CSParser:
+    NAMESPACE = "namespace FlatData"
+
     def __init__(self, file_path: str) -> None:
+        """Parse enums and structs of FlatData namespace in one pass over the file.
+
+        Lines outside FlatData namespace blocks are skipped without being parsed.
+
+        Args:
+            file_path (str): Path of dump.cs.
+        """
+        self.__enums: list[EnumType] = []
+        self.__structs: list[StructTable] = []
         with open(file_path, "rt", encoding="utf8") as file:
-            self.data = file.read()
-            start_token = "namespace FlatData"
-            start_idx = self.data.find(start_token)
+            self.__parse(self.__namespace_lines(file))
 
-            if start_idx == -1:
-                self.flatdata_part = ""
-                return
+    def __namespace_lines(self, file: Iterable[str]) -> Iterator[str]:
+        """Yield lines inside FlatData namespace blocks by counting their braces.
 
-            brace_idx = self.data.find("{", start_idx)
-            if brace_idx == -1:
-                self.flatdata_part = ""
+        Dumps have a namespace block per image, scanning resumes at the next one.
+        """
+        lines = iter(file)
+        for line in lines:
+            if (start := line.find(self.NAMESPACE)) == -1:
+                continue
+            line = line[start + len(self.NAMESPACE) :]
+
+            depth, opened = 0, False
+            while True:
+                if not opened and (brace := line.find("{")) != -1:
+                    opened, line = True, line[brace:]
+                if opened:
+                    depth += line.count("{") - line.count("}")
+                    yield line
+                    if depth <= 0:
+                        break
+                if (line := next(lines, None)) is None:
+                    return
+
+    def __parse(self, lines: Iterator[str]) -> None:
+        for line in lines:
+            if enum_match := Re.enum.search(line):
+                self.__parse_enum(enum_match.group(1), line[enum_match.end() :], lines)
+            elif struct_match := Re.struct.search(line):
+                self.__parse_struct(struct_match.group(1), lines)
+
+    def __parse_enum(self, enum_name: str, rest: str, lines: Iterator[str]) -> None:
+        # Members are between the braces following declaration.
+        content = []
+        while "{" not in rest:
+            if (rest := next(lines, None)) is None:
                 return
+        rest = rest[rest.index("{") + 1 :]
+        while "}" not in rest:
+            content.append(rest)
+            if (rest := next(lines, None)) is None:
+                return
+        content.append(rest[: rest.index("}")])
 
-            index = brace_idx
-            open_braces = 1
-
-            while index < len(self.data) - 1 and open_braces > 0:
-                index += 1
-                if self.data[index] == "{":
-                    open_braces += 1
-                elif self.data[index] == "}":
-                    open_braces -= 1
+        if "." in enum_name:
+            return
 
-            self.flatdata_part = self.data[start_idx:index + 1]
+        enum_members = []
+        for line in content:
+            for name, value in Re.enum_member.findall(line):
+                enum_members.append(EnumMember(name.strip(), value))
 
-    def parse_enum(self) -> list[EnumType]:
-        """Extract enum from cs."""
-        enums = []
-        for enum_name, content in Re.enum.findall(self.flatdata_part):
-            if "." in enum_name:
+        self.__enums.append(EnumType(enum_name, "int", enum_members))
+
+    def __parse_struct(self, struct_name: str, lines: Iterator[str]) -> None:
+        # Body is from the line after "{" to the line only having "}".
+        if (line := next(lines, None)) is None or line.strip() != "{":
+            return
+
+        properties: list[tuple[str, str]] = []
+        list_types: dict[str, str] = {}
+        for line in lines:
+            if line.strip() == "}":
+                break
+            if prop := Re.struct_property.search(line):
+                properties.append((prop.group(1), prop.group(2)))
+            elif method := Re.struct_list_method.search(line):
+                list_types.setdefault(method.group(2), method.group(1))
+
+        struct_properties = []
+        for prop_type, prop_name in properties:
+            if "ByteBuffer" in prop_name:
                 continue
+            struct_properties.append(
+                self.__parse_struct_property(prop_type, prop_name, list_types)
+            )
 
-            enum_members = []
-            for name, value in Re.enum_member.findall(content):
-                enum_members.append(EnumMember(name.strip(), value))
-
-            enums.append(EnumType(enum_name, "int", enum_members))
+        if struct_properties:
+            self.__structs.append(StructTable(struct_name, struct_properties))
 
-        return enums
+    def parse_enum(self) -> list[EnumType]:
+        """Extract enum from cs."""
+        return list(self.__enums)
 
     def __parse_struct_property(
-        self, prop_type: str, prop_name: str, prop_data: str
+        self, prop_type: str, prop_name: str, list_types: dict[str, str]
     ) -> Property:
         """Extract struct from cs."""
         # Has list in struct if there have its length property.
@@ -383,12 +691,8 @@ class CSParser:
 
         if len(prop_name) > 6 and prop_name.endswith("Length"):
             list_name = prop_name.removesuffix("Length")
-            re_type_of_list = re.search(
-                rf"public (?:FlatData\.)?(.+?)\?? {list_name}\(int j\) => default;", prop_data
-            )  # Get object type in list.
-
-            if re_type_of_list:
-                list_type = re_type_of_list.group(1)
+            # Get object type in list.
+            if list_type := list_types.get(list_name):
                 prop_is_list = True
 
                 list_type = list_type.removeprefix("Nullable<").removesuffix(">")
@@ -399,25 +703,7 @@ class CSParser:
 
     def parse_struct(self) -> list[StructTable]:
         """从数据中提取结构体"""
-        structs = []
-        # struct name, field
-        for struct_name, struct_data in Re.struct.findall(self.data):
-            struct_properties = []
-            for prop in Re.struct_property.finditer(struct_data):
-                prop_type = prop.group(1)
-                prop_name = prop.group(2)
-
-                if "ByteBuffer" in prop_name:
-                    continue
-
-                if extracted_property := self.__parse_struct_property(
-                    prop_type, prop_name, struct_data
-                ):
-                    struct_properties.append(extracted_property)
-
-            if struct_properties:
-                structs.append(StructTable(struct_name, struct_properties))
-        structs = [struct for struct in structs if not struct.name.endswith("ExcelTable")]
+        structs = [struct for struct in self.__structs if not struct.name.endswith("ExcelTable")]
         for struct in tuple(structs):
             if not struct.name.endswith("Excel"):
                 continue
@@ -427,6 +713,9 @@ class CSParser:
 
 class CompileToPython:
     DUMP_WRAPPER_NAME = "dump_wrapper"
+    REPACK_WRAPPER_NAME = "repack_wrapper"
+    MANIFEST_NAME = "manifest.json"
+    SCHEMA_NAME = "schema.json"
 
     def __init__(
         self, enums: list[EnumType], structs: list[StructTable], extract_dir: str
@@ -435,18 +724,184 @@ class CompileToPython:
         self.structs = structs
         self.extract_dir = extract_dir
 
-    def __type_in_struct_or_num(
-        self, prop_type: str, structs: list[StructTable], enums: list[EnumType]
-    ) -> StructTable | EnumType | None:
+        # Index types by name once, the first declaration wins like a linear search.
+        self.enums_by_name: dict[str, EnumType] = {}
         for enum in enums:
-            if prop_type == enum.name and enum.underlying_type in DataFlag.__members__:
-                return enum
+            self.enums_by_name.setdefault(enum.name, enum)
+        self.structs_by_name: dict[str, StructTable] = {}
+        for struct in structs:
+            self.structs_by_name.setdefault(struct.name, struct)
+
+        self.__signatures: dict[int, str] = {}
+        self.__table_schemas: dict[str, str] | None = None
 
+        self.types: dict[str, ResolvedType] = {}
         for struct in structs:
-            if prop_type == struct.name:
-                return struct
+            for prop in struct.properties:
+                if prop.data_type not in self.types:
+                    self.types[prop.data_type] = self.__resolve_type(prop.data_type)
+
+    def __resolve_type(self, data_type: str) -> ResolvedType:
+        """Resolve a property type name to its kind and enum or struct definition."""
+        if (enum := self.enums_by_name.get(data_type)) and enum.underlying_type in DataFlag.__members__:
+            return ResolvedType(TypeKind.enum, enum)
+        if struct := self.structs_by_name.get(data_type):
+            return ResolvedType(TypeKind.struct, struct)
+        if data_type in DataFlag.__members__:
+            return ResolvedType(TypeKind.scalar)
+        if data_type == "string":
+            return ResolvedType(TypeKind.string)
+        return ResolvedType(TypeKind.isolated)
+
+    def __type_in_struct_or_num(self, prop_type: str) -> StructTable | EnumType | None:
+        if (resolved := self.types.get(prop_type)) is None:
+            resolved = self.types[prop_type] = self.__resolve_type(prop_type)
+        return resolved.definition
+
+    def __signature(self, item: StructTable | EnumType) -> str:
+        if (signature := self.__signatures.get(id(item))) is None:
+            definition = repr(item)
+            if isinstance(item, StructTable):
+                # Accessors are generated by what each property type resolves to, not only by its name.
+                definition += repr([self.__resolved_signature(prop.data_type) for prop in item.properties])
+            signature = hashlib.sha1(definition.encode("utf8")).hexdigest()[:16]
+            self.__signatures[id(item)] = signature
+        return signature
+
+    def __resolved_signature(self, data_type: str) -> tuple[str, str | None, str | None]:
+        """Kind, definition name and enum underlying type a property type resolves to."""
+        self.__type_in_struct_or_num(data_type)
+        resolved = self.types[data_type]
+        definition = resolved.definition
+        return (
+            resolved.kind.name,
+            definition.name if definition else None,
+            definition.underlying_type if isinstance(definition, EnumType) else None,
+        )
 
-        return None
+    def signatures(self) -> dict[str, str]:
+        """Hash the definition of each enum and struct by the module it is written to.
+
+        The hash of a struct also covers what its property types resolve to, so it changes
+        when a type it uses is added, removed or changes between enum and struct.
+        """
+        return {
+            Utils.convert_name_to_available(item.name): self.__signature(item)
+            for item in [*self.enums, *self.structs]
+        }
+
+    def __schema_types(self, struct: StructTable, reached: dict[str, StructTable | EnumType]) -> None:
+        reached[struct.name] = struct
+        for prop in struct.properties:
+            definition = self.__type_in_struct_or_num(prop.data_type)
+            if isinstance(definition, StructTable) and definition.name not in reached:
+                self.__schema_types(definition, reached)
+            elif isinstance(definition, EnumType):
+                reached[definition.name] = definition
+
+    def table_schemas(self) -> dict[str, str]:
+        """Hash each table with every struct and enum its records reach.
+
+        A nested struct or enum changing also changes the hash of the tables using it.
+        """
+        if self.__table_schemas is not None:
+            return self.__table_schemas
+        schemas = {}
+        for table_name in self.__table_records():
+            if not (struct := self.structs_by_name.get(table_name)):
+                continue
+            reached: dict[str, StructTable | EnumType] = {}
+            self.__schema_types(struct, reached)
+            schemas[table_name] = hashlib.sha1(
+                "".join(self.__signature(reached[name]) for name in sorted(reached)).encode("utf8")
+            ).hexdigest()[:16]
+        self.__table_schemas = schemas
+        return schemas
+
+    def __generator_hash(self) -> str:
+        # Templates live in this file, definitions in lib.structure and module names come from
+        # Utils.convert_name_to_available, editing any of them regenerates every module.
+        digest = hashlib.sha1()
+        for module_file in (__file__, inspect.getsourcefile(StructTable)):
+            with open(module_file, "rb") as file:
+                digest.update(file.read())
+        digest.update(inspect.getsource(Utils.convert_name_to_available).encode("utf8"))
+        return digest.hexdigest()[:16]
+
+    def load_manifest(self) -> dict:
+        """Read the manifest of the previous generation, empty if there is none."""
+        try:
+            with open(os.path.join(self.extract_dir, self.MANIFEST_NAME), "rt", encoding="utf8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def stale_modules(self, manifest: dict) -> set[str]:
+        """Names of enum and struct modules to write, whose definition changed or file is missing."""
+        # Modules written by another version of the compiler are all stale.
+        previous = manifest.get("types", {}) if manifest.get("generator") == self.__generator_hash() else {}
+        return {
+            name
+            for name, signature in self.signatures().items()
+            if previous.get(name) != signature
+            or not os.path.exists(os.path.join(self.extract_dir, f"{name}.py"))
+        }
+
+    def remove_modules(self, manifest: dict) -> list[str]:
+        """Remove modules of the enums and structs which no longer exist.
+
+        Returns:
+            list[str]: Removed module names.
+        """
+        signatures = self.signatures()
+        removed = [name for name in manifest.get("types", {}) if name not in signatures]
+        for name in removed:
+            if os.path.exists(module := os.path.join(self.extract_dir, f"{name}.py")):
+                os.remove(module)
+        return removed
+
+    def wrappers_exist(self) -> bool:
+        return all(
+            os.path.exists(os.path.join(self.extract_dir, name))
+            for name in (
+                "__init__.py",
+                f"{self.DUMP_WRAPPER_NAME}.py",
+                f"{self.REPACK_WRAPPER_NAME}.py",
+                self.SCHEMA_NAME,
+            )
+        )
+
+    def table_changes(self, manifest: dict) -> dict[str, list[str]]:
+        """Compare table schemas with the manifest of the previous generation.
+
+        Returns:
+            dict[str, list[str]]: Table names which are "added", "removed" or "changed".
+        """
+        previous = manifest.get("tables", {})
+        current = self.table_schemas()
+        return {
+            "added": [name for name in current if name not in previous],
+            "removed": [name for name in previous if name not in current],
+            "changed": [
+                name for name, schema in current.items() if name in previous and previous[name] != schema
+            ],
+        }
+
+    def save_manifest(self, dump_mode: str, changes: dict[str, list[str]]) -> None:
+        """Record the generated definitions, read back by the next generation."""
+        os.makedirs(self.extract_dir, exist_ok=True)
+        with open(os.path.join(self.extract_dir, self.MANIFEST_NAME), "wt", encoding="utf8") as file:
+            json.dump(
+                {
+                    "generator": self.__generator_hash(),
+                    "dump_mode": dump_mode,
+                    "types": self.signatures(),
+                    "tables": self.table_schemas(),
+                    "changes": changes,
+                },
+                file,
+                indent=1,
+            )
 
     def __convert_scalar_type(
         self, prop: Property, index: int, p_name: str, f_offset: int, t_size: int
@@ -524,28 +979,42 @@ class CompileToPython:
         p_type = prop.data_type
         t_size = DataSize.struct.value
         if prop.is_list:
-            return String.FB_NON_SCALAR_LIST_CLASS_METHODS(
-                p_name,
-                f_offset,
-                t_size,
-                p_type,
-                p_type,
-                p_type,
-                p_name,
-                f_offset,
-                p_name,
-                f_offset,
+            return self.__non_scalar_list_methods(
+                p_name, p_type, f_offset, t_size
             ), String.FB_LIST_AND_NON_SCALAR_PROPERTY_FUNCTION(
                 p_name, p_name, index, p_name, p_name, t_size, t_size
             )
         
         return String.FB_STRUCT_PROPERTY_CLASS_METHODS(
             p_name,
+            p_type,
             f_offset,
+            String.FB_CHILD_CLASS_IMPORT(p_type, p_type, p_type),
             p_type,
+        ), String.FB_STRING_AND_STRUCT_PROPERTY_FUNCTION(p_name, p_name, index, p_name)
+
+    def __non_scalar_list_methods(
+        self, p_name: str, p_type: str, f_offset: int, t_size: int
+    ) -> str:
+        child_import = String.FB_CHILD_CLASS_IMPORT(p_type, p_type, p_type)
+        return String.FB_NON_SCALAR_LIST_CLASS_METHODS(
+            p_name,
             p_type,
+            f_offset,
+            t_size,
+            child_import,
             p_type,
-        ), String.FB_STRING_AND_STRUCT_PROPERTY_FUNCTION(p_name, p_name, index, p_name)
+            p_name,
+            p_type,
+            f_offset,
+            child_import,
+            p_type,
+            t_size,
+            p_name,
+            f_offset,
+            p_name,
+            f_offset,
+        )
 
     def __convert_isolated_type(
         self, prop: Property, index: int, p_name: str, f_offset: int, t_size: int
@@ -555,33 +1024,29 @@ class CompileToPython:
             p_name, p_name, index, p_name, p_name, t_size, t_size
         )
         if prop.is_list:
-            return (
-                String.FB_NON_SCALAR_LIST_CLASS_METHODS(
-                    p_name,
-                    f_offset,
-                    t_size,
-                    p_type,
-                    p_type,
-                    p_type,
-                    p_name,
-                    f_offset,
-                    p_name,
-                    f_offset,
-                ),
-                func,
-            )
+            return self.__non_scalar_list_methods(p_name, p_type, f_offset, t_size), func
         return (
             String.FB_ISOLATED_PROPERTY_CLASS_METHODS(
-                p_name, f_offset, p_type, p_type, p_type
+                p_name,
+                p_type,
+                f_offset,
+                String.FB_CHILD_CLASS_IMPORT(p_type, p_type, p_type),
+                p_type,
             ),
             func,
         )
 
-    def create_enum_files(self) -> None:
-        """Convert enum to python."""
+    def create_enum_files(self, names: set[str] | None = None) -> None:
+        """Convert enum to python.
+
+        Args:
+            names (set[str] | None, optional): Only write the modules of these names. Defaults to all.
+        """
         os.makedirs(self.extract_dir, exist_ok=True)
         for enum in self.enums:
             enum_name = Utils.convert_name_to_available(enum.name)
+            if names is not None and enum_name not in names:
+                continue
             with open(
                 f"{os.path.join(self.extract_dir, enum_name)}.py", "wt", encoding="utf8"
             ) as file:
@@ -601,18 +1066,26 @@ class CompileToPython:
                     )
                     file.write(String.NEWLINE)
 
-    def create_struct_files(self) -> None:
-        """Convert struct to python."""
+    def create_struct_files(self, names: set[str] | None = None) -> None:
+        """Convert struct to python.
+
+        Args:
+            names (set[str] | None, optional): Only write the modules of these names. Defaults to all.
+        """
         os.makedirs(self.extract_dir, exist_ok=True)
         for struct in self.structs:
             struct_name = Utils.convert_name_to_available(struct.name)
+            if names is not None and struct_name not in names:
+                continue
             function_string = String.FB_START_AND_END_FUNCTION(len(struct.properties))
             file = open(
                 f"{os.path.join(self.extract_dir, struct_name)}.py",
                 "wt",
                 encoding="utf8",
             )
-            file.write(String.FB_BASIC_CLASS(struct_name, struct_name))
+            methods = []
+            # Nested classes in first-use order, bound as module globals.
+            children: dict[str, None] = {}
 
             for index, prop in enumerate(struct.properties):
                 method, func = "", ""
@@ -637,13 +1110,12 @@ class CompileToPython:
                     )
 
                 # Prop type is struct or enum.
-                elif prop_data := self.__type_in_struct_or_num(
-                    prop.data_type, self.structs, self.enums
-                ):
+                elif prop_data := self.__type_in_struct_or_num(prop.data_type):
                     if isinstance(prop_data, StructTable):
                         method, func = self.__convert_struct_type(
                             prop, index, prop_name, field_offset
                         )
+                        children[prop.data_type] = None
                     elif isinstance(prop_data, EnumType):
                         method, func = self.__convert_enum_type(
                             prop, prop_data, index, prop_name, field_offset, type_size
@@ -654,14 +1126,23 @@ class CompileToPython:
                     method, func = self.__convert_isolated_type(
                         prop, index, prop_name, field_offset, type_size
                     )
+                    children[prop.data_type] = None
 
-                file.write(method)
+                methods.append(method)
                 function_string += func
 
+            child_classes = (
+                String.FB_CHILD_CLASSES(
+                    "".join(String.FB_CHILD_CLASS(child) for child in children)
+                )
+                if children
+                else ""
+            )
+            file.write(String.FB_BASIC_CLASS(child_classes, struct_name, struct_name))
+            file.write("".join(methods))
             if function_string:
                 file.write(String.NEWLINE * 2 + function_string)
-
-        file.close()
+            file.close()
 
     def create_module_file(self) -> None:
         """Create flatbuffer module file."""
@@ -670,40 +1151,65 @@ class CompileToPython:
             "wt",
             encoding="utf8",
         ) as file:
-            for enum in self.enums:
-                enum_name = Utils.convert_name_to_available(enum.name)
-                file.write(String.LOCAL_IMPORT(enum_name, enum_name) + String.NEWLINE)
+            names = "".join(
+                String.INDENT
+                + String.LAZY_MODULE_NAME(Utils.convert_name_to_available(item.name))
+                for item in [*self.enums, *self.structs]
+            )
+            file.write(String.LAZY_MODULE(names))
+
+    def __wrap_convertion(self, data_type: str, getter: str) -> str:
+        """Wrap getter of a scalar or string type with its decryption."""
+        if data_type == "string":
+            return String.WRAPPER_PASSWD_CONVERTION(ConvertFlag.string.value, getter)
+        if data_type in MaskedConvertFlag.__members__:
+            return String.WRAPPER_MASKS_CONVERTION(
+                MaskedConvertFlag[data_type].value, getter
+            )
+        # Integer types XOR with a precomputed mask, no struct round trip.
+        return String.WRAPPER_MASK_CONVERTION(getter, data_type)
+
+    def __wrap_array_prop(self, prop: Property, p_name: str) -> str:
+        """Wrap scalar or enum list prop decrypted in one step from its NumPy view."""
+        if prop.data_type in ArrayConvertFlag.__members__:
+            return String.WRAPPER_ARRAY_CONVERTION(
+                ArrayConvertFlag[prop.data_type].value, p_name
+            )
 
-            for struct in self.structs:
-                struct_name = Utils.convert_name_to_available(struct.name)
-                file.write(
-                    String.LOCAL_IMPORT(struct_name, struct_name) + String.NEWLINE
-                )
+        enum = self.__type_in_struct_or_num(prop.data_type)
+        if (
+            isinstance(enum, EnumType)
+            and enum.underlying_type in ArrayConvertFlag.__members__
+        ):
+            return String.WRAPPER_ENUM_ARRAY_CONVERTION(
+                Utils.convert_name_to_available(enum.name),
+                String.WRAPPER_ARRAY_CONVERTION(
+                    ArrayConvertFlag[enum.underlying_type].value, p_name
+                ),
+            )
+        return ""
 
     def __wrap_list_prop(self, prop: Property, p_name: str) -> str:
         func, convertion = "", ""
+        if convertion := self.__wrap_array_prop(prop, p_name):
+            return convertion
+
         if prop.data_type in ConvertFlag.__members__:
-            convertion = String.WRAPPER_PASSWD_CONVERTION(
-                ConvertFlag[prop.data_type].value, String.WRAPPER_LIST_GETTER(p_name)
+            convertion = self.__wrap_convertion(
+                prop.data_type, String.WRAPPER_LIST_GETTER(p_name)
             )
         elif prop.data_type == "bool":
             convertion = f"bool({String.WRAPPER_LIST_GETTER(p_name)})"
-        elif prop_data := self.__type_in_struct_or_num(
-            prop.data_type, self.structs, self.enums
-        ):
+        elif prop_data := self.__type_in_struct_or_num(prop.data_type):
             data_name = Utils.convert_name_to_available(prop_data.name)
             if isinstance(prop_data, StructTable):
-                convertion = String.WRAPPER_PASSWD_CONVERTION(
-                    f"dump_{Utils.convert_name_to_available(data_name)}",
-                    String.WRAPPER_LIST_GETTER(p_name),
-                )
+                return String.WRAPPER_STRUCT_LIST_CONVERTION(data_name, p_name)
 
             elif isinstance(prop_data, EnumType):
                 convertion = String.WRAPPER_ENUM_CONVERTION(
                     data_name,
-                    String.WRAPPER_PASSWD_CONVERTION(
-                        ConvertFlag[prop_data.underlying_type].value,
-                        String.WRAPPER_LIST_GETTER(p_name),
+                    self.__wrap_convertion(
+                        prop_data.underlying_type, String.WRAPPER_LIST_GETTER(p_name)
                     ),
                 )
 
@@ -713,59 +1219,57 @@ class CompileToPython:
         if convertion:
             func = String.WRAPPER_LIST_CONVERTION(convertion, p_name)
 
-        if func:
-            func = String.WRAPPER_LIST_KV(p_name, func)
-
         return func
 
-    def __wrap_prop(self, prop: Property, p_name: str) -> str:
+    def __wrap_prop(self, prop: Property, p_name: str, optional_struct: bool = False) -> str:
+        """Wrap a non-list prop.
+
+        Args:
+            prop (Property): Prop to wrap.
+            p_name (str): Available name of the prop.
+            optional_struct (bool, optional): Read an absent struct prop as None instead of dumping it. Defaults to False.
+        """
         func = ""
         if prop.data_type in ConvertFlag.__members__:
-            func = String.WRAPPER_PASSWD_CONVERTION(
-                ConvertFlag[prop.data_type].value, String.WRAPPER_GETTER(p_name)
+            func = self.__wrap_convertion(
+                prop.data_type, String.WRAPPER_GETTER(p_name)
             )
         elif prop.data_type == "bool":
             func = f"bool({String.WRAPPER_GETTER(p_name)})"
-        elif prop_data := self.__type_in_struct_or_num(
-            prop.data_type, self.structs, self.enums
-        ):
+        elif prop_data := self.__type_in_struct_or_num(prop.data_type):
             data_name = Utils.convert_name_to_available(prop_data.name)
-            if isinstance(prop_data, StructTable):
-                func = String.WRAPPER_PASSWD_CONVERTION(
-                    f"dump_{Utils.convert_name_to_available(data_name)}",
-                    String.WRAPPER_GETTER(p_name),
+            if isinstance(prop_data, StructTable) and optional_struct:
+                func = String.WRAPPER_OPTIONAL_STRUCT_CONVERTION(
+                    String.WRAPPER_GETTER(p_name), data_name
+                )
+            elif isinstance(prop_data, StructTable):
+                func = String.WRAPPER_STRUCT_CONVERTION(
+                    data_name, String.WRAPPER_GETTER(p_name)
                 )
 
             elif isinstance(prop_data, EnumType):
                 func = String.WRAPPER_ENUM_CONVERTION(
                     data_name,
-                    String.WRAPPER_PASSWD_CONVERTION(
-                        ConvertFlag[prop_data.underlying_type].value,
-                        String.WRAPPER_GETTER(p_name),
+                    self.__wrap_convertion(
+                        prop_data.underlying_type, String.WRAPPER_GETTER(p_name)
                     ),
                 )
         elif prop.data_type == "bool":
             func = String.WRAPPER_GETTER(p_name)
 
-        if func:
-            func = String.WRAPPER_PROP_KV(p_name, func)
-
         return func
 
-    def create_dump_dict_file(self) -> None:
-        """Dump excel structure of table to python dict."""
-        file = open(
-            os.path.join(self.extract_dir, f"{self.DUMP_WRAPPER_NAME}.py"),
-            "wt",
-            encoding="utf8",
-        )
-        file.write(String.WRAPPER_BASE)
+    def __enum_names(self, enum: EnumType) -> dict[int, str]:
+        """Map enum values to member names, the first member of a value like IntEnum."""
+        names: dict[int, str] = {}
+        for member in enum.members:
+            names.setdefault(int(member.value), Utils.convert_name_to_available(member.name))
+        return names
 
+    def __write_wrapper_enums(self, file) -> None:
         for enum in self.enums:
-            file.write(
-                String.WRAPPER_INT_ENUM(Utils.convert_name_to_available(enum.name))
-                + String.NEWLINE
-            )
+            enum_name = Utils.convert_name_to_available(enum.name)
+            file.write(String.WRAPPER_INT_ENUM(enum_name) + String.NEWLINE)
             if enum.underlying_type != "int":
                 notice(f"No implementation found for enum type: {enum.underlying_type}.")
             for kv in enum.members:
@@ -776,41 +1280,309 @@ class CompileToPython:
                     )
                     + String.NEWLINE
                 )
-            file.write(String.NEWLINE)
+            # A dict, not a tuple, so an unknown or negative value raises KeyError like the schema decoder.
+            file.write(String.WRAPPER_ENUM_NAMES(enum_name, self.__enum_names(enum)) + String.NEWLINE * 2)
+
+    def __table_records(self) -> dict[str, str]:
+        """Map each table struct name to the struct name of its records."""
+        struct_names = [Utils.convert_name_to_available(struct.name) for struct in self.structs]
+        name_set = set(struct_names)
+        return {
+            table_name: table_name.removesuffix("Table")
+            for table_name in struct_names
+            if table_name.endswith("Table") and table_name.removesuffix("Table") in name_set
+        }
+
+    def __write_dump_tables(self, file, func_prefix: str, records: dict[str, str]) -> None:
+        """Map each table class to the record function, view and password used by dump_table."""
+        items = ""
+        for table_name, excel_name in records.items():
+            items += String.INDENT + String.WRAPPER_DUMP_TABLE_ITEM(
+                table_name,
+                func_prefix + excel_name,
+                excel_name,
+                create_key(excel_name.removesuffix("Excel")),
+            )
+        file.write(String.WRAPPER_DUMP_TABLES(items))
+
+    def __dict_items(self, fields: list[tuple[str, str, str]]) -> str:
+        return "".join(
+            String.INDENT * 2 + String.WRAPPER_PROP_KV(name, func) for name, func, _ in fields
+        )
 
+    def __record_view(
+        self, struct_name: str, fields: list[tuple[str, str, str]], args: str, class_body: str
+    ) -> str:
+        """Create the lazy view class of a record struct.
+
+        Args:
+            struct_name (str): Record struct name.
+            fields (list[tuple[str, str, str]]): Field name, its convertion and the line binding its offset.
+            args (str): Unpacking of the view arguments the convertions read.
+            class_body (str): Extra class attributes.
+
+        Returns:
+            str: View class code.
+        """
+        properties = "".join(
+            String.WRAPPER_VIEW_PROPERTY(name, name, args, binding, name, func)
+            for name, func, binding in fields
+        )
+        return String.WRAPPER_VIEW_CLASS(
+            struct_name,
+            tuple(f"_{name}" for name, _, _ in fields),
+            tuple(name for name, _, _ in fields),
+            class_body,
+            properties,
+        )
+
+    def create_dump_dict_file(self) -> None:
+        """Dump excel structure of table to python dict."""
+        file = open(
+            os.path.join(self.extract_dir, f"{self.DUMP_WRAPPER_NAME}.py"),
+            "wt",
+            encoding="utf8",
+        )
+        file.write(String.WRAPPER_BASE)
+        self.__write_wrapper_enums(file)
+
+        records = self.__table_records()
+        record_names = set(records.values())
         for struct in self.structs:
             # if struct.name.endswith("Table"):
             # continue
             struct_name = Utils.convert_name_to_available(struct.name)
-            items = ""
+            fields = []
+            view_fields = []
             for prop in struct.properties:
                 prop_name = Utils.convert_name_to_available(prop.name)
-                func = ""
+                func = view_func = ""
 
                 if prop.is_list:
-                    func = self.__wrap_list_prop(prop, prop_name)
+                    func = view_func = self.__wrap_list_prop(prop, prop_name)
 
                 else:
                     func = self.__wrap_prop(prop, prop_name)
+                    view_func = self.__wrap_prop(prop, prop_name, optional_struct=True)
+
+                if func:
+                    fields.append((prop_name, func, ""))
+                    view_fields.append((prop_name, view_func, ""))
+            file.write(String.WRAPPER_FUNC(struct_name, self.__dict_items(fields)))
+
+            if struct_name in record_names:
+                file.write(
+                    self.__record_view(struct_name, view_fields, String.WRAPPER_VIEW_ARGS, "")
+                )
+
+        self.__write_dump_tables(file, "dump_", records)
+        file.close()
+
+    def __direct_convertion(self, data_type: str, offset: str) -> str:
+        """Read a scalar or string field from the buffer with its decryption."""
+        position = String.DIRECT_POSITION(offset)
+        if data_type == "string":
+            return String.WRAPPER_PASSWD_CONVERTION(
+                ConvertFlag.string.value,
+                String.DIRECT_FIELD(String.DIRECT_STRING(position), offset, None),
+            )
+        read = String.DIRECT_FIELD(String.DIRECT_SCALAR(data_type, position), offset, 0)
+        if data_type == "bool":
+            return f"bool{read}"
+        return self.__wrap_convertion(data_type, read)
+
+    def __direct_prop(self, prop: Property, offset: str) -> str:
+        if prop.data_type in ConvertFlag.__members__ or prop.data_type == "bool":
+            return self.__direct_convertion(prop.data_type, offset)
+
+        prop_data = self.__type_in_struct_or_num(prop.data_type)
+        if isinstance(prop_data, StructTable):
+            return String.DIRECT_FIELD(
+                String.DIRECT_STRUCT(
+                    Utils.convert_name_to_available(prop_data.name),
+                    String.DIRECT_POSITION(offset),
+                ),
+                offset,
+                None,
+            )
+        if isinstance(prop_data, EnumType):
+            return String.WRAPPER_ENUM_CONVERTION(
+                Utils.convert_name_to_available(prop_data.name),
+                self.__direct_convertion(prop_data.underlying_type, offset),
+            )
+        return ""
+
+    def __direct_list_prop(self, prop: Property, offset: str) -> str:
+        position = String.DIRECT_POSITION(offset)
+        if prop.data_type == "string":
+            return String.DIRECT_FIELD(String.DIRECT_STRING_LIST(position), offset, [])
+        if prop.data_type == "bool":
+            return String.DIRECT_FIELD(
+                String.DIRECT_ARRAY(position, NumpyFormat.bool.value) + ".tolist()",
+                offset,
+                [],
+            )
+        if prop.data_type in ArrayConvertFlag.__members__:
+            return String.DIRECT_ARRAY_CONVERTION(
+                ArrayConvertFlag[prop.data_type].value,
+                String.DIRECT_FIELD(
+                    String.DIRECT_ARRAY(position, NumpyFormat[prop.data_type].value),
+                    offset,
+                    0,
+                ),
+            )
+
+        prop_data = self.__type_in_struct_or_num(prop.data_type)
+        if isinstance(prop_data, StructTable):
+            return String.DIRECT_FIELD(
+                String.DIRECT_STRUCT_LIST(
+                    Utils.convert_name_to_available(prop_data.name), position
+                ),
+                offset,
+                [],
+            )
+        if (
+            isinstance(prop_data, EnumType)
+            and prop_data.underlying_type in ArrayConvertFlag.__members__
+        ):
+            return String.WRAPPER_ENUM_ARRAY_CONVERTION(
+                Utils.convert_name_to_available(prop_data.name),
+                String.DIRECT_ARRAY_CONVERTION(
+                    ArrayConvertFlag[prop_data.underlying_type].value,
+                    String.DIRECT_FIELD(
+                        String.DIRECT_ARRAY(
+                            position, NumpyFormat[prop_data.underlying_type].value
+                        ),
+                        offset,
+                        0,
+                    ),
+                ),
+            )
+        return ""
+
+    def create_direct_dump_dict_file(self) -> None:
+        """Dump excel structure of table to python dict, reading fields by offset.
 
-                items += String.INDENT * 2 + func
-            file.write(String.WRAPPER_FUNC(struct_name, items))
+        Same output as create_dump_dict_file, but each struct gets a decoder reading
+        its vtable once and unpacking fields from the buffer without accessor calls.
+        """
+        file = open(
+            os.path.join(self.extract_dir, f"{self.DUMP_WRAPPER_NAME}.py"),
+            "wt",
+            encoding="utf8",
+        )
+        file.write(String.DIRECT_WRAPPER_BASE)
+        self.__write_wrapper_enums(file)
+
+        records = self.__table_records()
+        record_names = set(records.values())
+        for struct in self.structs:
+            struct_name = Utils.convert_name_to_available(struct.name)
+            offsets = [String.DIRECT_OFFSET(index) for index in range(len(struct.properties))]
+            fields = []
+            for index, (prop, offset) in enumerate(zip(struct.properties, offsets)):
+                prop_name = Utils.convert_name_to_available(prop.name)
+                if prop.is_list:
+                    func = self.__direct_list_prop(prop, offset)
+                else:
+                    func = self.__direct_prop(prop, offset)
+
+                if func:
+                    fields.append(
+                        (prop_name, func, String.DIRECT_VIEW_OFFSET(offset, index))
+                    )
+
+            file.write(
+                String.DIRECT_WRAPPER_FUNC(
+                    struct_name,
+                    ", ".join(offsets) if len(offsets) > 1 else f"({offsets[0]},)",
+                    len(offsets),
+                    self.__dict_items(fields),
+                    struct_name,
+                    struct_name,
+                )
+            )
 
+            if struct_name in record_names:
+                file.write(
+                    self.__record_view(
+                        struct_name,
+                        fields,
+                        String.DIRECT_VIEW_ARGS,
+                        String.DIRECT_VIEW_VTABLE_SIZE(len(offsets)),
+                    )
+                )
+
+        self.__write_dump_tables(file, "decode_", records)
         file.close()
 
+    def create_schema_file(self) -> None:
+        """Describe the tables in a schema decoded by xtractor.schema without generated code.
+
+        Each struct lists its fields by vtable slot as [name, kind, type, is_list], where
+        kind is a TypeKind name and type is the enum or struct name for those kinds. Enums
+        map values to member names, tables name their record struct and encryption key.
+        """
+        enums = {}
+        for enum in self.enums:
+            if enum.underlying_type not in DataFlag.__members__:
+                continue
+            enums[Utils.convert_name_to_available(enum.name)] = {
+                "type": enum.underlying_type,
+                "names": {str(value): name for value, name in self.__enum_names(enum).items()},
+            }
+
+        structs = {}
+        for struct in self.structs:
+            fields = []
+            for prop in struct.properties:
+                resolved = self.types[prop.data_type]
+                data_type = (
+                    Utils.convert_name_to_available(resolved.definition.name)
+                    if resolved.definition
+                    else prop.data_type
+                )
+                fields.append(
+                    [Utils.convert_name_to_available(prop.name), resolved.kind.name, data_type, prop.is_list]
+                )
+            structs[Utils.convert_name_to_available(struct.name)] = fields
+
+        tables = {
+            table_name: {"record": excel_name, "key": excel_name.removesuffix("Excel")}
+            for table_name, excel_name in self.__table_records().items()
+        }
+
+        os.makedirs(self.extract_dir, exist_ok=True)
+        with open(os.path.join(self.extract_dir, self.SCHEMA_NAME), "wt", encoding="utf8") as file:
+            json.dump(
+                {"enums": enums, "structs": structs, "tables": tables},
+                file,
+                separators=(",", ":"),
+            )
+
     def create_repack_dict_file(self) -> None:
         WRAPPER_PACK_BASE = """import flatbuffers
-from lib.encryption import xor, create_key, convert_short, convert_ushort, convert_int, convert_uint, convert_long, convert_ulong, encrypt_float, encrypt_double, encrypt_string
+from lib.encryption import NO_MASKS, create_masks, encrypt_float_masked, encrypt_double_masked, encrypt_string
 from . import *
     """
-        self.enums_by_name = {enum.name: enum for enum in self.enums}
-        self.structs_by_name = {struct.name : struct for struct in self.structs}
         os.makedirs(self.extract_dir, exist_ok=True)
-        repack_path = os.path.join(self.extract_dir, "repack_wrapper.py")
+        repack_path = os.path.join(self.extract_dir, f"{self.REPACK_WRAPPER_NAME}.py")
         
         with open(repack_path, "wt", encoding="utf8") as file:
             file.write(WRAPPER_PACK_BASE)
             file.write("\n\n")
+            for enum in self.enums:
+                file.write(
+                    String.REPACK_ENUM_VALUES(
+                        Utils.convert_name_to_available(enum.name),
+                        {
+                            Utils.convert_name_to_available(member.name): int(member.value)
+                            for member in enum.members
+                        },
+                    )
+                    + String.NEWLINE
+                )
+            file.write("\n\n")
 
             for struct in self.structs:
                 struct_name = Utils.convert_name_to_available(struct.name)
@@ -831,7 +1603,8 @@ from . import *
 
                 file.write(f"def pack_{struct_name}(builder: flatbuffers.Builder, data: dict, encrypt=True) -> int:\n")
                 password_key = struct.name[:-5] if struct.name.endswith("Excel") else struct.name
-                file.write(f'    password = create_key("{password_key}") if encrypt else None\n')
+                file.write(f'    masks = create_masks("{password_key}") if encrypt else NO_MASKS\n')
+                file.write("    password = masks.key\n")
                 
                 # Process all strings first
                 string_fields = [prop for prop in struct.properties if prop.data_type == "string" and not prop.is_list]
@@ -884,19 +1657,141 @@ from . import *
         if data_type == "bool":
             return value_var, data_type
         if data_type in self.enums_by_name:
-            return f"convert_int(getattr({data_type}, {value_var}), password)", "int"
+            return f"{Utils.convert_name_to_available(data_type)}_VALUES[{value_var}] ^ masks.int", "int"
         elif data_type == "float":
-            return f"encrypt_float({value_var}, password)", data_type
+            return f"encrypt_float_masked({value_var}, masks)", data_type
         elif data_type == "double":
-            return f"encrypt_double({value_var}, password)", data_type
+            return f"encrypt_double_masked({value_var}, masks)", data_type
         else:
-            conversion_map = {
-                "short": "convert_short",
-                "ushort": "convert_ushort",
-                "int": "convert_int",
-                "uint": "convert_uint",
-                "long": "convert_long",
-                "ulong": "convert_ulong"
-            }
-            func = conversion_map.get(data_type, "convert_int")
-            return f"{func}({value_var}, password)", data_type
+            mask = data_type if data_type in ("short", "ushort", "int", "uint", "long", "ulong") else "int"
+            return f"{value_var} ^ masks.{mask}", data_type
+
+
+class FlatDataBundle:
+    """Single zip of precompiled FlatData modules imported with zipimport.
+
+    The bundle is named by a hash of the package sources and the interpreter cache
+    tag, e.g. "FlatData-0123456789abcdef.cpython-311.zip", as bytecode only loads on
+    the interpreter version it was compiled for. The full hash is kept in the zip
+    comment, so a renamed bundle is still checked against the sources next to it.
+    """
+
+    PYC_UNCHECKED_HASH = (0b01).to_bytes(4, "little")
+    """Flags of a hash-based pyc which is never checked against its source."""
+
+    @staticmethod
+    def build(extract_dir: str) -> str:
+        """Compile the FlatData sources in extract dir to a bundle next to them.
+
+        Modules whose source did not change keep the bytecode of the previous bundle.
+
+        Args:
+            extract_dir (str): Dir having FlatData, its path is also the module path, e.g. "Extracted".
+
+        Returns:
+            str: Bundle path.
+        """
+        archive_dir = "/".join([*os.path.normpath(extract_dir).split(os.sep), "FlatData"])
+        digest = hashlib.sha1()
+        temp_path = os.path.join(extract_dir, "FlatData.zip.tmp")
+        previous_path = FlatDataBundle.find(extract_dir)
+        with (
+            ZipFile(temp_path, "w", ZIP_DEFLATED) as bundle,
+            ZipFile(previous_path) if previous_path else nullcontext() as previous,
+        ):
+            # Directory entries make the parent dirs namespace package portions.
+            parts = archive_dir.split("/")
+            for index in range(len(parts)):
+                bundle.writestr(ZipInfo("/".join(parts[: index + 1]) + "/"), b"")
+
+            for name, source in FlatDataBundle.__sources(extract_dir):
+                digest.update(name.encode("utf8") + source)
+                header = MAGIC_NUMBER + FlatDataBundle.PYC_UNCHECKED_HASH + source_hash(source)
+                pyc = FlatDataBundle.__previous_pyc(previous, f"{archive_dir}/{name}c", header)
+                if pyc is None:
+                    code = compile(source, f"{archive_dir}/{name}", "exec", dont_inherit=True)
+                    pyc = header + marshal.dumps(code)
+                bundle.writestr(ZipInfo(f"{archive_dir}/{name}c"), pyc, ZIP_DEFLATED)
+            bundle.comment = digest.hexdigest().encode("ascii")
+
+        FlatDataBundle.remove(extract_dir)
+        bundle_path = os.path.join(
+            extract_dir,
+            f"FlatData-{digest.hexdigest()[:16]}.{sys.implementation.cache_tag}.zip",
+        )
+        os.replace(temp_path, bundle_path)
+        return bundle_path
+
+    @staticmethod
+    def __sources(extract_dir: str) -> Iterator[tuple[str, bytes]]:
+        """Yield the name and source of each FlatData module in extract dir, sorted by name."""
+        package_dir = os.path.join(extract_dir, "FlatData")
+        for name in sorted(os.listdir(package_dir)):
+            if name.endswith(".py"):
+                with open(os.path.join(package_dir, name), "rb") as file:
+                    yield name, file.read()
+
+    @staticmethod
+    def source_digest(extract_dir: str) -> str | None:
+        """Hash of the FlatData sources in extract dir as stored by build, None if there are none."""
+        if not os.path.isdir(os.path.join(extract_dir, "FlatData")):
+            return None
+        digest = hashlib.sha1()
+        for name, source in FlatDataBundle.__sources(extract_dir):
+            digest.update(name.encode("utf8") + source)
+        return digest.hexdigest()
+
+    @staticmethod
+    def __previous_pyc(previous: ZipFile | None, name: str, header: bytes) -> bytes | None:
+        """Reuse bytecode of the previous bundle if it was compiled from the same source."""
+        if previous is None or name not in previous.NameToInfo:
+            return None
+        pyc = previous.read(name)
+        return pyc if pyc.startswith(header) else None
+
+    @staticmethod
+    def find(extract_dir: str) -> str | None:
+        """Find the newest bundle for the running interpreter in extract dir."""
+        bundles = glob.glob(
+            os.path.join(glob.escape(extract_dir), f"FlatData-*.{sys.implementation.cache_tag}.zip")
+        )
+        return max(bundles, key=os.path.getmtime) if bundles else None
+
+    @staticmethod
+    def find_current(extract_dir: str) -> str | None:
+        """Find the bundle of extract dir if it was built from the sources in it.
+
+        A bundle built before the sources were regenerated, or without a hash in its
+        comment, is ignored. A bundle shipped without sources is always current.
+        """
+        if not (bundle := FlatDataBundle.find(extract_dir)):
+            return None
+        if (expected := FlatDataBundle.source_digest(extract_dir)) is None:
+            return bundle
+        with ZipFile(bundle) as archive:
+            return bundle if archive.comment.decode("ascii", "replace") == expected else None
+
+    @staticmethod
+    def remove(extract_dir: str) -> None:
+        """Remove the bundles in extract dir, e.g. when its sources are regenerated."""
+        for bundle in glob.glob(os.path.join(glob.escape(extract_dir), "FlatData-*.zip")):
+            os.remove(bundle)
+
+    @staticmethod
+    def load(extract_dir: str) -> str | None:
+        """Put the bundle of extract dir in front of sys.path if there is one.
+
+        A bundle not built from the current sources is not loaded, so the sources are imported instead.
+
+        Returns:
+            str | None: Path of the loaded bundle.
+        """
+        if not (bundle := FlatDataBundle.find_current(extract_dir)):
+            if FlatDataBundle.find(extract_dir):
+                notice("FlatData bundle is outdated, import sources instead. Run setup_flatdata.py to rebuild it.")
+            return None
+        bundle = os.path.abspath(bundle)
+        if bundle not in sys.path:
+            sys.path.insert(0, bundle)
+            importlib.invalidate_caches()
+        return bundle
@@ -2,12 +2,21 @@
 
 import hashlib
 import math
+import mmap
+import os
+import sys
+import tempfile
+import threading
 import time
+import zlib
 from base64 import b64decode, b64encode
-from binascii import crc32
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from struct import Struct
-from typing import TypeVar
+from typing import Iterable, Iterator, Literal, NamedTuple, TypeVar
 
+import numpy as np
 from Crypto.Cipher import AES
 from Crypto.Protocol.KDF import PBKDF2
 from Crypto.Random import get_random_bytes
@@ -15,6 +24,8 @@ from Crypto.Util.Padding import pad, unpad
 from Crypto.Util.strxor import strxor
 from xxhash import xxh32_intdigest, xxh64_intdigest
 
+from utils.config import Config
+
 T = TypeVar("T", int, float)
 
 SHORT = Struct("<h")
@@ -26,6 +37,10 @@ ULONG = Struct("<Q")
 FLOAT = Struct("<f")
 DOUBLE = Struct("<d")
 
+BASE64_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
 AES_BLOCK_SIZE = 128 // 8
 AES_KEY_SIZE = 128 // 8
 PBKDF2_DERIVATION_ITERATIONS = 1000
@@ -52,8 +67,10 @@ def calculate_crc(path: str) -> int:
     Returns:
         int: Crc checksum.
     """
-    with open(path, "rb") as f:
-        return crc32(f.read()) & 0xFFFFFFFF
+    crc = 0
+    for chunk in _read_chunks(path):
+        crc = zlib.crc32(chunk, crc)
+    return crc & 0xFFFFFFFF
 
 
 def calculate_md5(path: str) -> str:
@@ -63,8 +80,49 @@ def calculate_md5(path: str) -> str:
     Returns:
         str: MD5 checksum.
     """
-    with open(path, "rb") as f:
-        return hashlib.md5(f.read()).hexdigest()
+    md5 = hashlib.md5()
+    for chunk in _read_chunks(path):
+        md5.update(chunk)
+    return md5.hexdigest()
+
+
+def _read_chunks(path: str, chunk_size: int = HASH_CHUNK_SIZE) -> Iterator[memoryview]:
+    """Read a file through one reusable buffer so memory does not grow with file size."""
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while size := f.readinto(buffer):
+            yield view[:size]
+
+
+def calculate_checksums(
+    paths: Iterable[str],
+    check_type: Literal["crc", "md5"] = "crc",
+    max_workers: int = Config.threads,
+) -> dict[str, int | str | None]:
+    """Calculate checksums of many files concurrently.
+
+    zlib and hashlib release the GIL on large chunks, so threads hash files in parallel.
+
+    Args:
+        paths (Iterable[str]): File paths.
+        check_type (Literal["crc", "md5"], optional): Checksum to calculate. Defaults to "crc".
+        max_workers (int, optional): Number of threads. Defaults to Config.threads.
+
+    Returns:
+        dict[str, int | str | None]: Checksum by path, None if the file cannot be read.
+    """
+    calculate = calculate_crc if check_type == "crc" else calculate_md5
+
+    def worker(path: str) -> int | str | None:
+        try:
+            return calculate(path)
+        except OSError:
+            return None
+
+    paths = list(paths)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(paths, executor.map(worker, paths)))
 
 
 def zip_password(key: str) -> bytes:
@@ -72,18 +130,99 @@ def zip_password(key: str) -> bytes:
     return b64encode(create_key(key, 15))
 
 
+def __zipcrypto_crc_table() -> list[int]:
+    table = []
+    for value in range(256):
+        for _ in range(8):
+            value = (value >> 1) ^ 0xEDB88320 if value & 1 else value >> 1
+        table.append(value)
+    return table
+
+
+ZIPCRYPTO_CRC_TABLE = __zipcrypto_crc_table()
+"""CRC-32 table updating the ZipCrypto keys."""
+
+ZIPCRYPTO_STREAM_TABLE = bytes(
+    (((k | 2) * ((k | 2) ^ 1)) >> 8) & 0xFF for k in range(1 << 16)
+)
+"""Keystream byte of ZipCrypto for each value of the low 16 bits of key2."""
+
+
+class ZipCrypto:
+    """Traditional PKWARE encryption (ZipCrypto) of one zip member.
+
+    The keys are updated with every plaintext byte, so decryption cannot be
+    vectorized. The loop is kept to table lookups instead: the keystream byte
+    is precomputed for every key2 and the keys stay local while a whole chunk
+    is processed, where zipfile calls a Python function per byte.
+    """
+
+    def __init__(self, password: bytes) -> None:
+        """Initialize the keys with the password.
+
+        Args:
+            password (bytes): Zip password, e.g. zip_password("Excel.zip").
+        """
+        crc = ZIPCRYPTO_CRC_TABLE
+        key0, key1, key2 = 305419896, 591751049, 878082192
+        for c in password:
+            key0 = (key0 >> 8) ^ crc[(key0 ^ c) & 0xFF]
+            key1 = ((key1 + (key0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+            key2 = (key2 >> 8) ^ crc[(key2 ^ (key1 >> 24)) & 0xFF]
+        self.keys = (key0, key1, key2)
+
+    def decrypt(self, data: bytes | bytearray | memoryview) -> bytearray:
+        """Decrypt the next chunk of the member, chunks must be passed in order."""
+        crc, stream = ZIPCRYPTO_CRC_TABLE, ZIPCRYPTO_STREAM_TABLE
+        key0, key1, key2 = self.keys
+        out = bytearray(len(data))
+        i = 0
+        for b in data:
+            c = b ^ stream[key2 & 0xFFFF]
+            out[i] = c
+            i += 1
+            key0 = (key0 >> 8) ^ crc[(key0 ^ c) & 0xFF]
+            key1 = ((key1 + (key0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+            key2 = (key2 >> 8) ^ crc[(key2 ^ (key1 >> 24)) & 0xFF]
+        self.keys = (key0, key1, key2)
+        return out
+
+    def encrypt(self, data: bytes | bytearray | memoryview) -> bytearray:
+        """Encrypt the next chunk of the member, chunks must be passed in order."""
+        crc, stream = ZIPCRYPTO_CRC_TABLE, ZIPCRYPTO_STREAM_TABLE
+        key0, key1, key2 = self.keys
+        out = bytearray(len(data))
+        i = 0
+        for c in data:
+            out[i] = c ^ stream[key2 & 0xFFFF]
+            i += 1
+            key0 = (key0 >> 8) ^ crc[(key0 ^ c) & 0xFF]
+            key1 = ((key1 + (key0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+            key2 = (key2 >> 8) ^ crc[(key2 ^ (key1 >> 24)) & 0xFF]
+        self.keys = (key0, key1, key2)
+        return out
+
+
 def create_key(name: str, size: int = 8) -> bytes:
     """Create a random key based on a hashed name and a specific size."""
-    seed = calculate_hash(name)
-    return MersenneTwister(seed).next_bytes(size)
+    return keystream_cache.get(name, size)
+
 
+def xor_with_key(
+    name: str, data: bytes, out: bytearray | memoryview | None = None
+) -> bytes | memoryview:
+    """XOR the data with a generated key based on the name.
 
-def xor_with_key(name: str, data: bytes) -> bytes:
-    """XOR the data with a generated key based on the name."""
+    If ``out`` is given the result is written into it and a view of its first
+    ``len(data)`` bytes is returned, so a caller can decrypt every table into
+    the same buffer.
+    """
     if not data:
         return data
-    mask = create_key(name, len(data))
-    return xor(data, mask)
+    mask = keystream_cache.view(name, len(data))
+    if out is None:
+        return strxor(data, mask)
+    return xor_into(out, data, mask)
 
 
 def xor(value: bytes, key: bytes) -> bytes:
@@ -94,13 +233,110 @@ def xor(value: bytes, key: bytes) -> bytes:
         return strxor(value, key)
     if len(value) < len(key):
         return strxor(value, key[: len(value)])
+    if not key:
+        raise ValueError("Cannot repeat an empty key.")
     # Handle the case where the value is longer than the key
-    return b"".join(
-        strxor(value[i : i + len(key)], key)
-        for i in range(0, len(value) - len(key) + 1, len(key))
-    ) + strxor(
-        value[len(value) - len(value) % len(key) :], key[: len(value) % len(key)]
+    out = bytearray(len(value))
+    xor_into(out, value, key)
+    return bytes(out)
+
+
+def xor_into(
+    out: bytearray | memoryview | mmap.mmap,
+    value: bytes | bytearray | memoryview | mmap.mmap,
+    key: bytes | memoryview,
+) -> memoryview:
+    """XOR value with a repeating key into a writable buffer without per-chunk copies.
+
+    ``out`` may be ``value`` itself to decrypt in place. The key is repeated to a
+    multiple of 8 bytes and broadcast over a uint64 view of the value, the
+    remaining tail is handled byte by byte.
+
+    Returns:
+        memoryview: View of the first len(value) bytes of out.
+    """
+    size = len(value)
+    target = memoryview(out).cast("B")[:size]
+    if len(target) < size:
+        raise ValueError(f"Output buffer is smaller than data ({len(target)} < {size}).")
+    dst = np.frombuffer(target, dtype=np.uint8)
+    src = np.frombuffer(value, dtype=np.uint8, count=size)
+    mask = np.frombuffer(key, dtype=np.uint8)
+    if not (size and len(mask)):
+        dst[:] = src
+        return target
+
+    if len(mask) >= size:
+        pattern, body = mask[:size], size - size % 8
+    else:
+        # Smallest run of whole keys that is also whole uint64 words.
+        period = math.lcm(len(mask), 8)
+        if period > size:
+            period = len(mask)
+        pattern = np.tile(mask, period // len(mask))
+        body = size - size % period
+        if period % 8:
+            np.bitwise_xor(
+                src[:body].reshape(-1, period), pattern, out=dst[:body].reshape(-1, period)
+            )
+        else:
+            words = period // 8
+            np.bitwise_xor(
+                src[:body].view(np.uint64).reshape(-1, words),
+                pattern.view(np.uint64),
+                out=dst[:body].view(np.uint64).reshape(-1, words),
+            )
+        np.bitwise_xor(src[body:], pattern[: size - body], out=dst[body:])
+        return target
+
+    np.bitwise_xor(
+        src[:body].view(np.uint64), pattern[:body].view(np.uint64), out=dst[:body].view(np.uint64)
     )
+    np.bitwise_xor(src[body:], pattern[body:], out=dst[body:])
+    return target
+
+
+def xor_inplace(buffer: bytearray | memoryview | mmap.mmap, key: bytes | memoryview) -> memoryview:
+    """XOR a writable buffer with a repeating key in place."""
+    return xor_into(buffer, buffer, key)
+
+
+class XorMasks(NamedTuple):
+    """A key reduced to one integer mask per scalar type.
+
+    Signed masks are sign-extended, so XOR with an in-range signed value
+    stays in range and gives the same result as ``xor_struct``.
+    """
+
+    key: bytes | None
+    short: int
+    ushort: int
+    int: int
+    uint: int
+    long: int
+    ulong: int
+
+    @classmethod
+    def from_key(cls, key: bytes | None) -> "XorMasks":
+        """Reduce a key to masks. An empty or None key gives zero masks."""
+        masks = []
+        for struct in (SHORT, USHORT, INT, UINT, LONG, ULONG):
+            if not key:
+                masks.append(0)
+                continue
+            # Same repeating rule as xor for keys shorter than the value.
+            packed = (key * -(-struct.size // len(key)))[: struct.size]
+            masks.append(struct.unpack(packed)[0])
+        return cls(key, *masks)
+
+
+NO_MASKS = XorMasks.from_key(None)
+
+
+@lru_cache(maxsize=None)
+def create_masks(name: str) -> XorMasks:
+    """Create the masks of the default size key of a name."""
+    return XorMasks.from_key(create_key(name))
 
 
 def xor_struct(value: T, key: bytes, struct: Struct) -> T:
@@ -181,12 +417,127 @@ def encrypt_double(value: float, key: bytes = b"") -> float:
     return (convert_long(int(value * 100000), key)) if key else value
 
 
+def _xor_array(values: np.ndarray | int, key: bytes, dtype: str) -> np.ndarray:
+    """XOR every element with the key repeated to the element size, as xor_struct does."""
+    # Generated AsNumpy accessors return 0 when the vector is absent.
+    array = values if isinstance(values, np.ndarray) else np.empty(0, dtype=dtype)
+    array = array.astype(dtype, copy=False)
+    if not key:
+        return array
+    size = array.dtype.itemsize
+    mask = np.frombuffer((key * -(-size // len(key)))[:size], dtype=dtype)
+    return array ^ mask
+
+
+def convert_short_array(values: np.ndarray | int, key: bytes = b"") -> np.ndarray:
+    """Vectorized convert_short over a NumPy view. Without key the view is returned as is."""
+    return _xor_array(values, key, "<i2")
+
+
+def convert_ushort_array(values: np.ndarray | int, key: bytes = b"") -> np.ndarray:
+    """Vectorized convert_ushort over a NumPy view. Without key the view is returned as is."""
+    return _xor_array(values, key, "<u2")
+
+
+def convert_int_array(values: np.ndarray | int, key: bytes = b"") -> np.ndarray:
+    """Vectorized convert_int over a NumPy view. Without key the view is returned as is."""
+    return _xor_array(values, key, "<i4")
+
+
+def convert_uint_array(values: np.ndarray | int, key: bytes = b"") -> np.ndarray:
+    """Vectorized convert_uint over a NumPy view. Without key the view is returned as is."""
+    return _xor_array(values, key, "<u4")
+
+
+def convert_long_array(values: np.ndarray | int, key: bytes = b"") -> np.ndarray:
+    """Vectorized convert_long over a NumPy view. Without key the view is returned as is."""
+    return _xor_array(values, key, "<i8")
+
+
+def convert_ulong_array(values: np.ndarray | int, key: bytes = b"") -> np.ndarray:
+    """Vectorized convert_ulong over a NumPy view. Without key the view is returned as is."""
+    return _xor_array(values, key, "<u8")
+
+
+def convert_float_array(values: np.ndarray | int, key: bytes = b"") -> np.ndarray:
+    """Vectorized convert_float over a NumPy view. Without key the view is returned as is."""
+    array = _xor_array(values, b"", "<f4")
+    if not key:
+        return array
+    # astype truncates toward zero like int().
+    return convert_int_array(array.astype("<i4"), key) * 0.00001
+
+
+def convert_double_array(values: np.ndarray | int, key: bytes = b"") -> np.ndarray:
+    """Vectorized convert_double over a NumPy view. Without key the view is returned as is."""
+    array = _xor_array(values, b"", "<f8")
+    if not key:
+        return array
+    return convert_long_array(array.astype("<i8"), key) * 0.00001
+
+
+def convert_float_masked(value: float, masks: XorMasks) -> float:
+    """Same as convert_float with a key reduced by XorMasks."""
+    return (int(value) ^ masks.int) * 0.00001 if masks.key else value
+
+
+def convert_double_masked(value: float, masks: XorMasks) -> float:
+    """Same as convert_double with a key reduced by XorMasks."""
+    return (int(value) ^ masks.long) * 0.00001 if masks.key else value
+
+
+def encrypt_float_masked(value: float, masks: XorMasks) -> float:
+    """Same as encrypt_float with a key reduced by XorMasks."""
+    return int(value * 100000) ^ masks.int if masks.key else value
+
+
+def encrypt_double_masked(value: float, masks: XorMasks) -> float:
+    """Same as encrypt_double with a key reduced by XorMasks."""
+    return int(value * 100000) ^ masks.long if masks.key else value
+
+
 def convert_string(value: bytes | str, key: bytes = b"") -> str:
     """Decrypt or decode a base64 string or raw bytes, depending on the input."""
+    return string_decoder.decode(value, key)
+
+
+def decode_string(value: bytes | str, key: bytes = b"") -> str:
+    """Uncached convert_string.
+
+    Canonical base64 bytes skip the exception-driven path: they always decode,
+    and an odd number of decoded bytes can never be UTF-16, so these fall back
+    to UTF-8 directly with the same result.
+    """
     if not value:
         return ""
     if key is None:
         return value
+    if not key:
+        # xor rejects an empty key, so every path ends in the UTF-8 fallback.
+        return value.decode("utf8") if isinstance(value, bytes) else ""
+    if not _is_canonical_base64(value):
+        return _decode_string_lenient(value, key)
+
+    raw = b64decode(value)
+    if raw and not len(raw) % 2:
+        try:
+            if decoded := xor(raw, key).decode("utf16"):
+                return decoded
+        except UnicodeDecodeError:
+            pass
+    return value.decode("utf8")
+
+
+def _is_canonical_base64(value: bytes | str) -> bool:
+    """Check bytes only use the base64 alphabet with at most two padding chars."""
+    if not isinstance(value, bytes) or len(value) % 4:
+        return False
+    body = value.rstrip(b"=")
+    return len(value) - len(body) <= 2 and not body.translate(None, BASE64_ALPHABET)
+
+
+def _decode_string_lenient(value: bytes | str, key: bytes) -> str:
+    """Decode with b64decode discarding non-alphabet chars, as the game data may need."""
     try:
         raw = b64decode(value)
         if decoded := xor(raw, key).decode("utf16"):
@@ -197,6 +548,8 @@ def convert_string(value: bytes | str, key: bytes = b"") -> str:
             return value.decode("utf8")
 
     return ""
+
+
 def encrypt_string(value: str, key: bytes = b"") -> str:
     """Encrypt a string using XOR and encode it in properly padded Base64."""
     if key is None:
@@ -374,4 +727,348 @@ class MersenneTwister:
         """Generates a random number with 53-bit resolution."""
         a = self.genrand_int32() >> 5
         b = self.genrand_int32() >> 6
-        return (a * 67108864.0 + b) * (1.0 / 9007199254740992.0)
\ No newline at end of file
+        return (a * 67108864.0 + b) * (1.0 / 9007199254740992.0)
+
+class BulkMersenneTwister:
+    """MT19937 generating whole 624-word blocks with NumPy.
+
+    The output is byte-identical to ``MersenneTwister.next_bytes``: every
+    4 bytes come from one ``genrand_int31`` word, and a call consumes
+    ``ceil(length / 4)`` words even when the last one is cut short.
+    """
+
+    N = MersenneTwister.N
+    M = MersenneTwister.M
+    MATRIX_A = np.uint32(MersenneTwister.MATRIX_A)
+    UPPER_MASK = np.uint32(MersenneTwister.UPPER_MASK)
+    LOWER_MASK = np.uint32(MersenneTwister.LOWER_MASK)
+
+    def __init__(self, seed: int | None = None) -> None:
+        # Seeding is a sequential recurrence, reuse the scalar implementation.
+        self.mt = np.array(MersenneTwister(seed).mt, dtype=np.uint32)
+        self.block = np.empty(0, dtype=np.uint32)  # Tempered words not consumed yet.
+
+    @classmethod
+    def from_state(cls, mt: np.ndarray) -> "BulkMersenneTwister":
+        """Resume a generator from a state saved on a block boundary."""
+        generator = cls.__new__(cls)
+        generator.mt = np.array(mt, dtype=np.uint32)
+        generator.block = np.empty(0, dtype=np.uint32)
+        return generator
+
+    def _twist(self) -> None:
+        """Regenerate the state in place.
+
+        mt[i] depends on mt[i + M], which wraps to freshly updated words once
+        i >= N - M, so the update runs in slices no longer than N - M.
+        """
+        mt, n, m = self.mt, self.N, self.M
+        for start in range(0, n - 1, n - m):
+            stop = min(start + n - m, n - 1)
+            y = (mt[start:stop] & self.UPPER_MASK) | (
+                mt[start + 1 : stop + 1] & self.LOWER_MASK
+            )
+            src = start + m if start + m < n else start + m - n
+            mt[start:stop] = (
+                mt[src : src + stop - start] ^ (y >> 1) ^ ((y & 1) * self.MATRIX_A)
+            )
+        y = (mt[n - 1] & self.UPPER_MASK) | (mt[0] & self.LOWER_MASK)
+        mt[n - 1] = mt[m - 1] ^ (y >> 1) ^ ((y & 1) * self.MATRIX_A)
+
+    def _generate_blocks(self, count: int) -> np.ndarray:
+        """Twist ``count`` times and return the tempered 31-bit words of every block."""
+        out = np.empty((count, self.N), dtype=np.uint32)
+        for i in range(count):
+            self._twist()
+            out[i] = self.mt
+        y = out.reshape(-1)
+        y ^= y >> 11
+        y ^= (y << 7) & np.uint32(0x9D2C5680)
+        y ^= (y << 15) & np.uint32(0xEFC60000)
+        y ^= y >> 18
+        y >>= 1
+        return y
+
+    def next_words(self, count: int) -> np.ndarray:
+        """Return the next ``count`` words, same as calling ``genrand_int31`` repeatedly."""
+        if count <= len(self.block):
+            words, self.block = self.block[:count], self.block[count:]
+            return words
+        missing = count - len(self.block)
+        fresh = self._generate_blocks(-(-missing // self.N))
+        words = np.concatenate((self.block, fresh[:missing]))
+        self.block = fresh[missing:]
+        return words
+
+    def next_bytes(self, length: int) -> bytes:
+        """Generates random bytes."""
+        if length <= 0:
+            return b""
+        words = self.next_words(-(-length // 4))
+        return words.astype("<u4", copy=False).tobytes()[:length]
+
+
+class KeystreamCache:
+    """Cache of MT keystreams keyed by the seed of a name.
+
+    A keystream only depends on its seed and shorter requests are prefixes of
+    longer ones, so only the longest stream generated for a seed is kept and
+    it is extended from the saved generator state when a longer one is needed.
+    Streams are kept in a bounded LRU and, from ``min_persist_size`` bytes,
+    stored in ``cache_dir`` as ``<seed>.mtks`` files that are mmap-ed on load::
+
+        header (magic, version, seed, blocks) | MT state | keystream
+    """
+
+    MAGIC = b"MTKS"
+    VERSION = 1
+    HEADER = Struct("<4sIII")
+    BLOCK_SIZE = BulkMersenneTwister.N * 4
+    STATE_OFFSET = HEADER.size
+    DATA_OFFSET = STATE_OFFSET + BLOCK_SIZE
+
+    def __init__(
+        self,
+        cache_dir: str = "",
+        max_memory: int = 256 * 1024 * 1024,
+        min_persist_size: int = 64 * 1024,
+    ) -> None:
+        """
+        Args:
+            cache_dir (str, optional): Folder of the on-disk store. Empty to disable it. Defaults to "".
+            max_memory (int, optional): Maximum bytes of keystream kept in memory. Defaults to 256MB.
+            min_persist_size (int, optional): Shorter streams are cheaper to generate than to load and stay in memory only. Defaults to 64KB.
+        """
+        self.cache_dir = cache_dir
+        self.max_memory = max_memory
+        self.min_persist_size = min_persist_size
+        self.memory_size = 0
+        # seed -> (keystream, generator state after its last block)
+        self.entries: OrderedDict[int, tuple[bytes | memoryview, np.ndarray]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.seed_locks: dict[int, threading.Lock] = {}
+
+    def get(self, name: str, size: int) -> bytes:
+        """Return the first ``size`` bytes of the keystream of ``name``."""
+        return bytes(self.view(name, size))
+
+    def view(self, name: str, size: int) -> memoryview:
+        """Same as get but return a read-only view on the cached stream without copying it."""
+        if size <= 0:
+            return memoryview(b"")
+        seed = calculate_hash(name)
+        with self.lock:
+            entry = self.entries.get(seed)
+            if entry and len(entry[0]) >= size:
+                self.entries.move_to_end(seed)
+                return memoryview(entry[0])[:size]
+            seed_lock = self.seed_locks.setdefault(seed, threading.Lock())
+
+        # Generate outside the cache lock so other names are not blocked.
+        with seed_lock:
+            with self.lock:
+                # Views are taken under the lock, an evicted stream may be unmapped right after.
+                if entry := self.entries.get(seed):
+                    if len(entry[0]) >= size:
+                        return memoryview(entry[0])[:size]
+                    entry = (memoryview(entry[0]), entry[1])
+
+            # Another run may have stored a longer stream meanwhile.
+            stored = self.__load(seed)
+            if stored and (not entry or len(stored[0]) > len(entry[0])):
+                entry = stored
+            entry = self.__extend(seed, size, entry)
+            if stored and stored[0] is not entry[0]:
+                self.__release(stored[0])
+            # Take the view before the entry is shared, an eviction then keeps its map open.
+            view = memoryview(entry[0])[:size]
+            self.__remember(seed, entry)
+            with self.lock:
+                # Later requests find the entry first, a lock per seed ever seen is not kept.
+                if self.seed_locks.get(seed) is seed_lock:
+                    del self.seed_locks[seed]
+            return view
+
+    def clear(self) -> None:
+        """Drop all in-memory entries. The on-disk store is kept."""
+        with self.lock:
+            for stream, _ in self.entries.values():
+                self.__release(stream)
+            self.entries.clear()
+            self.memory_size = 0
+
+    def __path(self, seed: int) -> str:
+        return os.path.join(self.cache_dir, f"{seed:08x}.mtks")
+
+    def __extend(
+        self,
+        seed: int,
+        size: int,
+        entry: tuple[bytes | memoryview, np.ndarray] | None,
+    ) -> tuple[bytes | memoryview, np.ndarray]:
+        if entry and len(entry[0]) >= size:
+            return entry
+
+        stream, state = entry if entry else (b"", None)
+        generator = (
+            BulkMersenneTwister.from_state(state)
+            if state is not None
+            else BulkMersenneTwister(seed)
+        )
+        blocks = -(-(size - len(stream)) // self.BLOCK_SIZE)
+        fresh = generator._generate_blocks(blocks).astype("<u4", copy=False).tobytes()
+        entry = (bytes(stream) + fresh, generator.mt.copy())
+
+        if self.cache_dir and len(entry[0]) >= self.min_persist_size:
+            self.__save(seed, entry)
+        return entry
+
+    def __remember(self, seed: int, entry: tuple[bytes | memoryview, np.ndarray]) -> None:
+        with self.lock:
+            if previous := self.entries.pop(seed, None):
+                self.memory_size -= len(previous[0])
+                if previous[0] is not entry[0]:
+                    self.__release(previous[0])
+            if len(entry[0]) > self.max_memory:
+                self.__release(entry[0])
+                return
+            self.entries[seed] = entry
+            self.memory_size += len(entry[0])
+            while self.memory_size > self.max_memory:
+                _, (stream, _) = self.entries.popitem(last=False)
+                self.memory_size -= len(stream)
+                self.__release(stream)
+
+    @staticmethod
+    def __release(stream: bytes | memoryview) -> None:
+        """Unmap a stream loaded from the store once it is no longer cached.
+
+        The map stays open, and is closed when collected, while callers hold views of it.
+        """
+        if not (isinstance(stream, memoryview) and isinstance(mapped := stream.obj, mmap.mmap)):
+            return
+        try:
+            stream.release()
+            mapped.close()
+        except BufferError:
+            pass
+
+    def __load(self, seed: int) -> tuple[memoryview, np.ndarray] | None:
+        """Map a stored keystream. Return None if missing or invalid."""
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self.__path(seed), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        if len(mapped) < self.DATA_OFFSET:
+            mapped.close()
+            return None
+        magic, version, stored_seed, blocks = self.HEADER.unpack_from(mapped)
+        if (
+            magic != self.MAGIC
+            or version != self.VERSION
+            or stored_seed != seed
+            or len(mapped) != self.DATA_OFFSET + blocks * self.BLOCK_SIZE
+        ):
+            mapped.close()
+            return None
+        # Copy the small state so only the stream view holds the map open.
+        state = np.frombuffer(
+            mapped, dtype="<u4", count=BulkMersenneTwister.N, offset=self.STATE_OFFSET
+        ).copy()
+        return memoryview(mapped)[self.DATA_OFFSET :], state
+
+    def __save(self, seed: int, entry: tuple[bytes | memoryview, np.ndarray]) -> None:
+        """Write the keystream atomically so concurrent runs never read a partial file."""
+        stream, state = entry
+        temp_path = ""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(
+                    self.HEADER.pack(
+                        self.MAGIC, self.VERSION, seed, len(stream) // self.BLOCK_SIZE
+                    )
+                )
+                f.write(state.astype("<u4", copy=False).tobytes())
+                f.write(stream)
+            os.replace(temp_path, self.__path(seed))
+        except OSError:
+            # The store is only an optimization.
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+keystream_cache = KeystreamCache(Config.keystream_cache_dir, Config.keystream_cache_memory)
+
+
+class StringDecoder:
+    """convert_string with a bounded memo keyed by (ciphertext, key).
+
+    Tables repeat the same strings a lot, so a hit returns the string decoded
+    the first time. Each table has its own key, hence counters kept per key
+    give the hit rate of a table. Counters are not locked and may be slightly
+    low when tables are decoded in parallel.
+    """
+
+    def __init__(self, max_size: int = 1 << 18, intern: bool = False) -> None:
+        """
+        Args:
+            max_size (int, optional): Maximum number of memoized strings. Defaults to 262144.
+            intern (bool, optional): Intern decoded strings so equal ones share one object across keys. Defaults to False.
+        """
+        self.max_size = max_size
+        self.intern = intern
+        self.cache: dict[tuple[bytes | str, bytes], str] = {}
+        self.counters: dict[bytes, list[int]] = {}  # key -> [hits, misses]
+        self.lock = threading.Lock()
+
+    def decode(self, value: bytes | str, key: bytes = b"") -> str:
+        """Same as convert_string."""
+        if not value or key is None:
+            return decode_string(value, key)
+        if isinstance(value, (bytearray, memoryview)):
+            value = bytes(value)
+        key = bytes(key)
+
+        counter = self.counters.get(key) or self.counters.setdefault(key, [0, 0])
+        if (decoded := self.cache.get((value, key))) is not None:
+            counter[0] += 1
+            return decoded
+
+        counter[1] += 1
+        decoded = decode_string(value, key)
+        if self.intern:
+            decoded = sys.intern(decoded)
+        with self.lock:
+            if len(self.cache) >= self.max_size:
+                # Drop the oldest entry, dicts keep insertion order.
+                self.cache.pop(next(iter(self.cache)))
+            self.cache[(value, key)] = decoded
+        return decoded
+
+    def table_stats(self, name: str) -> tuple[int, int]:
+        """Return (hits, misses) of a table, e.g. "ScenarioScriptExcelTable"."""
+        key = create_key(name.removesuffix("Table").removesuffix("Excel"))
+        hits, misses = self.counters.get(key, (0, 0))
+        return hits, misses
+
+    def stats(self) -> dict[bytes, tuple[int, int, float]]:
+        """Return (hits, misses, hit rate) for every key seen."""
+        return {
+            key: (hits, misses, hits / (hits + misses) if hits + misses else 0.0)
+            for key, (hits, misses) in self.counters.items()
+        }
+
+    def clear(self) -> None:
+        """Drop memoized strings and counters."""
+        with self.lock:
+            self.cache.clear()
+            self.counters.clear()
+
+
+string_decoder = StringDecoder(Config.string_cache_size, Config.intern_strings)
@@ -0,0 +1,121 @@
+"""Direct FlatBuffer reads used by generated decoders.
+
+The functions take the raw buffer and absolute positions, so a table is decoded
+without building a flatbuffers.table.Table or a FlatData object per field.
+"""
+
+from struct import Struct
+
+import numpy as np
+
+UOFFSET = Struct("<I")
+SOFFSET = Struct("<i")
+VOFFSET = Struct("<H")
+
+unpack_bool = Struct("<?").unpack_from
+unpack_byte = Struct("<b").unpack_from
+unpack_sbyte = Struct("<b").unpack_from
+unpack_ubyte = Struct("<B").unpack_from
+unpack_short = Struct("<h").unpack_from
+unpack_ushort = Struct("<H").unpack_from
+unpack_int = Struct("<i").unpack_from
+unpack_uint = Struct("<I").unpack_from
+unpack_long = Struct("<q").unpack_from
+unpack_ulong = Struct("<Q").unpack_from
+unpack_float = Struct("<f").unpack_from
+unpack_double = Struct("<d").unpack_from
+
+__vtable_structs: dict[int, Struct] = {}
+
+
+class RecordView:
+    """Base of generated record views.
+
+    A view keeps what its record is decoded from and decrypts each field on first
+    access, so reading a few columns of a table skips the others.
+    """
+
+    __slots__ = ("_args",)
+    FIELDS: tuple[str, ...] = ()
+
+    def __init__(self, *args) -> None:
+        self._args = args
+
+    def to_dict(self) -> dict:
+        """Decode every field, same as the dict dumped for the record."""
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_dict()})"
+
+
+def json_default(value):
+    """Serialize what dumped records hold besides JSON types, for json.dump(default=...).
+
+    Scalar vectors are dumped as NumPy arrays and converted to lists only here.
+    """
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, RecordView):
+        return value.to_dict()
+    raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
+
+
+def __vtable_struct(count: int) -> Struct:
+    if (vtable_struct := __vtable_structs.get(count)) is None:
+        vtable_struct = __vtable_structs.setdefault(count, Struct(f"<{count}H"))
+    return vtable_struct
+
+
+def read_vtable(buf, pos: int, count: int) -> tuple[int, ...]:
+    """Read the field offsets of a table in one step.
+
+    Args:
+        buf (bytes | bytearray | memoryview): FlatBuffer data.
+        pos (int): Absolute position of the table.
+        count (int): Field count of the table schema.
+
+    Returns:
+        tuple[int, ...]: Offset of each field relative to pos, 0 if the field is absent.
+    """
+    vtable = pos - SOFFSET.unpack_from(buf, pos)[0]
+    size = (VOFFSET.unpack_from(buf, vtable)[0] - 4) >> 1
+    if size >= count:
+        return __vtable_struct(count).unpack_from(buf, vtable + 4)
+    # Fields appended to the schema after the data was built are absent.
+    return __vtable_struct(size).unpack_from(buf, vtable + 4) + (0,) * (count - size)
+
+
+def indirect(buf, offset: int) -> int:
+    """Return the absolute position referenced by the uoffset at offset."""
+    return offset + UOFFSET.unpack_from(buf, offset)[0]
+
+
+def read_string(buf, offset: int) -> bytes:
+    """Return the bytes of the string referenced at offset."""
+    start = offset + UOFFSET.unpack_from(buf, offset)[0]
+    return bytes(buf[start + 4 : start + 4 + UOFFSET.unpack_from(buf, start)[0]])
+
+
+def __vector(buf, offset: int) -> tuple[int, int]:
+    start = offset + UOFFSET.unpack_from(buf, offset)[0]
+    return start + 4, UOFFSET.unpack_from(buf, start)[0]
+
+
+def read_array(buf, offset: int, dtype: str) -> np.ndarray:
+    """Return a NumPy view over the scalar vector referenced at offset."""
+    start, length = __vector(buf, offset)
+    return np.frombuffer(buf, dtype, length, start)
+
+
+def read_tables(buf, offset: int) -> list[int]:
+    """Return absolute positions of the tables in the vector referenced at offset."""
+    start, length = __vector(buf, offset)
+    offsets = np.frombuffer(buf, "<u4", length, start).astype(np.int64)
+    return (offsets + np.arange(start, start + 4 * length, 4)).tolist()
+
+
+def read_strings(buf, offset: int) -> list[bytes]:
+    """Return the bytes of each string in the vector referenced at offset."""
+    start, length = __vector(buf, offset)
+    return [read_string(buf, position) for position in range(start, start + 4 * length, 4)]
@@ -57,6 +57,20 @@ class EnumType:
     members: list[EnumMember]
 
 
+class TypeKind(Enum):
+    scalar = 0
+    string = 1
+    enum = 2
+    struct = 3
+    isolated = 4
+
+
+@dataclass
+class ResolvedType:
+    kind: TypeKind
+    definition: StructTable | EnumType | None = None
+
+
 class ResourceType(Enum):
     table = 0
     media = 1
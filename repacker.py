@@ -1,5 +1,6 @@
 import os
 import importlib
+from lib.compiler import FlatDataBundle
 from lib.console import notice
 from pathlib import Path
 import json
@@ -11,6 +12,7 @@ import sqlite3
 class TableRepackerImpl:
     def __init__(self, flat_data_module_name):
         try:
+            FlatDataBundle.load(flat_data_module_name.rpartition(".")[0].replace(".", os.sep))
             self.flat_data_lib = importlib.import_module(flat_data_module_name)
             self.repack_wrapper_lib = importlib.import_module(
                 f"{flat_data_module_name}.repack_wrapper"
@@ -84,7 +86,7 @@ class TableRepackerImpl:
                 offset = pack_func(builder, entry, False)
                 builder.Finish(offset)
                 bytes_output = bytes(builder.Output())
-                flatbuffer_class = self.flat_data_lib.__dict__[table_type]
+                flatbuffer_class = getattr(self.flat_data_lib, table_type)
                 flatbuffer_obj = getattr(flatbuffer_class, "GetRootAs")(bytes_output)
                 #bytes_output = xor_with_key(table_type, bytes_output)
 
@@ -1,7 +1,17 @@
 from os import path
+from lib.compiler import FlatDataBundle
 EXTRACT_DIR = "Extracted"
 DUMP_PATH = "Dumps"
-if not path.exists(path.join(EXTRACT_DIR, "FlatData")):
+if FlatDataBundle.find_current(EXTRACT_DIR):
+    pass
+elif path.exists(path.join(EXTRACT_DIR, "FlatData")):
+    # Preset sources without a bundle built from them, compile them once so later runs import bytecode only.
+    # Never regenerate them from a local dump.cs, it may be of another game version.
+    if not path.exists(path.join(EXTRACT_DIR, "FlatData", "schema.json")):
+        from lib.console import notice
+        notice("Preset FlatData has no schema.json, the schema decoder and npy output are unavailable.")
+    FlatDataBundle.build(EXTRACT_DIR)
+else:
     import setup_apk
     from lib.dumper import IL2CppDumper
     from lib.console import notice
@@ -35,5 +45,5 @@ if not path.exists(path.join(EXTRACT_DIR, "FlatData")):
         extract_path, abs_il2cpp_path, abs_metadata_path, 5
     )
     notice("Dump il2cpp binary file successfully.")
-    compile_python(path.join(extract_path, "dump.cs"), EXTRACT_DIR)
+    compile_python(path.join(extract_path, "dump.cs"), EXTRACT_DIR, bundle=True)
     notice("Generated FlatData to dir: " + EXTRACT_DIR)
\ No newline at end of file
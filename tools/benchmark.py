@@ -0,0 +1,330 @@
+import argparse
+import importlib.util
+import json
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from zipfile import ZipFile
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from lib.compiler import CSParser
+from lib.encryption import BulkMersenneTwister, MersenneTwister, calculate_hash, string_decoder, zip_password
+from lib.flatbuffer import json_default
+from xtractor.columnar import ColumnarTable
+from utils.util import ZipUtils
+from xtractor.table import TableExtractor
+
+MB = 1024 * 1024
+
+
+def timeit(func, *args, repeat: int = 1) -> float:
+    """Return the best wall time of func(*args) in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_keystream(args) -> None:
+    seed = calculate_hash(args.name)
+    print(f"{'size':>8} {'MersenneTwister':>16} {'BulkMersenneTwister':>20} {'speedup':>8}")
+    for size_mb in args.sizes:
+        size = int(size_mb * MB)
+        if MersenneTwister(seed).next_bytes(MB) != BulkMersenneTwister(seed).next_bytes(MB):
+            raise AssertionError("Keystream mismatch between implementations.")
+        legacy = timeit(lambda: MersenneTwister(seed).next_bytes(size))
+        bulk = timeit(lambda: BulkMersenneTwister(seed).next_bytes(size), repeat=args.repeat)
+        print(f"{size_mb:>6}MB {legacy:>15.3f}s {bulk:>19.3f}s {legacy / bulk:>7.1f}x")
+
+
+def bench_table(args) -> None:
+    extractor = TableExtractor("", "", args.flat_data, args.views)
+    for file in args.files:
+        with open(file, "rb") as f:
+            data = f.read()
+        name = Path(file).name
+        records, _ = extractor._process_bytes_file(name, data)
+        if not records:
+            print(f"{name}: cannot decode with {args.flat_data}.")
+            continue
+        table_name = extractor.lower_fb_name_modules.get(Path(file).stem.lower()).__name__
+
+        def decode():
+            # Every run starts with a cold string memo.
+            string_decoder.clear()
+            records, _ = extractor._process_bytes_file(name, data)
+            for column in args.columns:
+                for record in records:
+                    record[column] if isinstance(record, dict) else getattr(record, column)
+
+        best = timeit(decode, repeat=args.repeat)
+        hits, misses = string_decoder.table_stats(table_name)
+        hit_rate = hits / (hits + misses) if hits + misses else 0
+        tracemalloc.start()
+        decode()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(
+            f"{name}: {len(records)} records in {best:.3f}s, {len(records) / best:,.0f} records/s, "
+            f"peak memory {peak / MB:.1f}MB, string memo hit rate {hit_rate:.1%} ({hits}/{hits + misses})"
+        )
+
+
+def same_records(records, other) -> bool:
+    """Compare dumped records as serialized, scalar vectors may be NumPy arrays or lists."""
+    return json.dumps(records, default=json_default) == json.dumps(other, default=json_default)
+
+
+def compare_extractors(
+    files: list[str], extractors: dict[str, TableExtractor], repeat: int, serialize: bool = False
+) -> None:
+    """Check extractors dump the same records and compare their speed, the first is the baseline.
+
+    With serialize, the time also includes dumping the records to JSON.
+    """
+    (name_a, extractor), (name_b, against) = extractors.items()
+    for file in files:
+        with open(file, "rb") as f:
+            data = f.read()
+        name = Path(file).name
+        records, _ = extractor._process_bytes_file(name, data)
+        if not same_records(records, against._process_bytes_file(name, data)[0]):
+            raise AssertionError(f"{name}: {name_a} and {name_b} dump different records.")
+        if not records:
+            print(f"{name}: cannot decode with {name_a}.")
+            continue
+
+        times = []
+        for table_extractor in (extractor, against):
+
+            def decode():
+                string_decoder.clear()
+                records, _ = table_extractor._process_bytes_file(name, data)
+                if serialize:
+                    json.dumps(records, ensure_ascii=False, default=json_default)
+
+            times.append(timeit(decode, repeat=repeat))
+        print(
+            f"{name}: {len(records)} identical records, {name_a} {times[0]:.3f}s, "
+            f"{name_b} {times[1]:.3f}s, {times[1] / times[0]:.2f}x"
+        )
+
+
+def bench_compare(args) -> None:
+    compare_extractors(
+        args.files,
+        {
+            args.flat_data: TableExtractor("", "", args.flat_data),
+            args.against: TableExtractor("", "", args.against),
+        },
+        args.repeat,
+        args.serialize,
+    )
+
+
+def bench_schema(args) -> None:
+    compare_extractors(
+        args.files,
+        {
+            "dump_wrapper": TableExtractor("", "", args.flat_data),
+            "schema": TableExtractor("", "", args.flat_data, decoder="schema"),
+        },
+        args.repeat,
+    )
+
+
+def bench_columnar(args) -> None:
+    extractor = TableExtractor("", "", args.flat_data, output_format="npy")
+    for file in args.files:
+        with open(file, "rb") as f:
+            data = f.read()
+        name = Path(file).name
+        table, table_name = extractor._process_bytes_columnar(name, data)
+        if table is None:
+            print(f"{name}: cannot decode with schema.json of {args.flat_data}.")
+            continue
+        records, _ = extractor._process_bytes_file(name, data)
+        if table.to_records() != [{column: record[column] for column in table.columns} for record in records]:
+            raise AssertionError(f"{name}: columns differ from dumped records.")
+
+        def decode_columns():
+            string_decoder.clear()
+            extractor._process_bytes_columnar(name, data)
+
+        def decode_records():
+            string_decoder.clear()
+            extractor._process_bytes_file(name, data)
+
+        columnar = timeit(decode_columns, repeat=args.repeat)
+        dicts = timeit(decode_records, repeat=args.repeat)
+        with tempfile.TemporaryDirectory() as folder:
+            table.save(str(Path(folder, table_name)))
+            json_path = Path(folder, f"{table_name}.json")
+            json_path.write_text(json.dumps(records, ensure_ascii=False, default=json_default), encoding="utf8")
+            npy_open = timeit(lambda: ColumnarTable.load(str(Path(folder, table_name))), repeat=args.repeat)
+            json_open = timeit(lambda: json.loads(json_path.read_text(encoding="utf8")), repeat=args.repeat)
+        print(
+            f"{name}: {table.rows} records, {len(table.columns)} columns ({len(table.skipped)} skipped), "
+            f"decode columns {columnar:.3f}s vs records {dicts:.3f}s, "
+            f"open npy {npy_open * 1000:.1f}ms vs json {json_open * 1000:.1f}ms"
+        )
+
+
+def bench_zip(args) -> None:
+    password = zip_password(args.password_key)
+    with ZipFile(args.zip) as z:
+        names = [info.filename for info in z.infolist() if not info.is_dir()]
+        size = sum(info.file_size for info in z.infolist())
+
+    results = {}
+
+    def read_zipfile():
+        with ZipFile(args.zip) as z:
+            results["zipfile"] = {name: z.read(name, pwd=password) for name in names}
+
+    timings = {"zipfile": timeit(read_zipfile, repeat=args.repeat)}
+    for workers in args.workers:
+        label = f"ZipCryptoReader x{workers}"
+
+        def read_members():
+            results[label] = dict(ZipUtils.read_members(args.zip, password, names, workers))
+
+        timings[label] = timeit(read_members, repeat=args.repeat)
+        if results[label] != results["zipfile"]:
+            raise AssertionError(f"{label} and zipfile read different members.")
+
+    print(f"{Path(args.zip).name}: {len(names)} members, {size / MB:.1f}MB")
+    for label, best in timings.items():
+        print(f"{label:>22} {best:>8.3f}s {size / MB / best:>7.1f}MB/s {timings['zipfile'] / best:>6.2f}x")
+
+
+def bench_unpack(args) -> None:
+    # unpack_excel imports the whole extractor, only load it for this benchmark.
+    from unpack_excel import process_excel_table
+
+    outputs = {}
+    print(f"{'workers':>7} {'threads':>9} {'processes':>10} {'speedup':>8}")
+    for workers in args.workers:
+        times = []
+        for processes in (False, True):
+            folder = Path(tempfile.mkdtemp())
+
+            def unpack():
+                process_excel_table(Path(args.zip), folder, args.flat_data, workers, processes=processes)
+
+            times.append(timeit(unpack, repeat=args.repeat))
+            table_dir = folder / "ExcelTable"
+            outputs[(workers, processes)] = {file.name: file.read_bytes() for file in table_dir.iterdir()}
+            shutil.rmtree(folder)
+        if outputs[(workers, False)] != outputs[(workers, True)]:
+            raise AssertionError(f"Threads and processes write different tables with {workers} workers.")
+        print(f"{workers:>7} {times[0]:>8.3f}s {times[1]:>9.3f}s {times[0] / times[1]:>7.2f}x")
+
+
+def load_parser(compiler_file: str):
+    """Load CSParser from another copy of lib/compiler.py, e.g. from an older revision."""
+    spec = importlib.util.spec_from_file_location("compiler_against", compiler_file)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.CSParser
+
+
+def bench_parser(args) -> None:
+    parsers = {"CSParser": CSParser}
+    if args.against:
+        parsers[args.against] = load_parser(args.against)
+
+    size = Path(args.dump).stat().st_size
+    results = {}
+    for name, parser_class in parsers.items():
+
+        def parse():
+            parser = parser_class(args.dump)
+            results[name] = (parser.parse_enum(), parser.parse_struct())
+
+        best = timeit(parse, repeat=args.repeat)
+        enums, structs = results[name]
+        print(f"{name}: {len(enums)} enums, {len(structs)} structs in {best:.3f}s, {size / MB / best:.1f}MB/s")
+
+    if args.against and results["CSParser"] != results[args.against]:
+        raise AssertionError(f"CSParser and {args.against} parse different enums or structs.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the table decoding pipeline.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    keystream = subparsers.add_parser("keystream", help="Compare MT19937 keystream generators.")
+    keystream.add_argument("--sizes", type=float, nargs="+", default=[1, 10, 50], help="Keystream sizes in MB.")
+    keystream.add_argument("--name", default="ScenarioScriptExcelTable", help="Table name used as seed.")
+    keystream.add_argument("--repeat", type=int, default=3)
+    keystream.set_defaults(func=bench_keystream)
+
+    table = subparsers.add_parser("table", help="Decode table files and report records per second.")
+    table.add_argument("files", nargs="+", help="Table .bytes files, e.g. scenarioscriptexceltable.bytes.")
+    table.add_argument("--flat-data", default="Extracted.FlatData", help="Module path of FlatData.")
+    table.add_argument("--views", action="store_true", help="Decode records as lazy views instead of dicts.")
+    table.add_argument("--columns", nargs="*", default=[], help="Columns read from every record after decoding.")
+    table.add_argument("--repeat", type=int, default=3)
+    table.set_defaults(func=bench_table)
+
+    compare = subparsers.add_parser(
+        "compare", help="Check two generated FlatData dump the same records and compare their speed."
+    )
+    compare.add_argument("files", nargs="+", help="Table .bytes files.")
+    compare.add_argument("--flat-data", default="Extracted.FlatData", help="Module path of FlatData, e.g. generated with dump_mode=\"direct\".")
+    compare.add_argument("--against", required=True, help="Module path of the FlatData to compare with.")
+    compare.add_argument("--serialize", action="store_true", help="Also time dumping the records to JSON.")
+    compare.add_argument("--repeat", type=int, default=3)
+    compare.set_defaults(func=bench_compare)
+
+    schema = subparsers.add_parser(
+        "schema", help="Check the schema decoder dumps the same records as the generated dump wrapper and compare their speed."
+    )
+    schema.add_argument("files", nargs="+", help="Table .bytes files.")
+    schema.add_argument("--flat-data", default="Extracted.FlatData", help="Module path of FlatData having schema.json.")
+    schema.add_argument("--repeat", type=int, default=3)
+    schema.set_defaults(func=bench_schema)
+
+    columnar = subparsers.add_parser(
+        "columnar", help="Compare decoding tables into NumPy columns with dumping records, and opening .npy with json."
+    )
+    columnar.add_argument("files", nargs="+", help="Table .bytes files.")
+    columnar.add_argument("--flat-data", default="Extracted.FlatData", help="Module path of FlatData having schema.json.")
+    columnar.add_argument("--repeat", type=int, default=3)
+    columnar.set_defaults(func=bench_columnar)
+
+    zip_reader = subparsers.add_parser("zip", help="Compare reading a ZipCrypto zip with zipfile and ZipCryptoReader.")
+    zip_reader.add_argument("zip", help="Path of the zip, e.g. Excel.zip.")
+    zip_reader.add_argument("--password-key", default="Excel.zip", help="Name the zip password is derived from.")
+    zip_reader.add_argument("--workers", type=int, nargs="+", default=[1, 4], help="Process counts of ZipCryptoReader.")
+    zip_reader.add_argument("--repeat", type=int, default=1)
+    zip_reader.set_defaults(func=bench_zip)
+
+    unpack = subparsers.add_parser(
+        "unpack", help="Compare unpack_excel decoding Excel.zip tables with threads and with processes."
+    )
+    unpack.add_argument("zip", help="Path of Excel.zip.")
+    unpack.add_argument("--flat-data", default="Extracted.FlatData", help="Module path of FlatData.")
+    unpack.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16], help="Thread and process counts.")
+    unpack.add_argument("--repeat", type=int, default=1)
+    unpack.set_defaults(func=bench_unpack)
+
+    cs_parser = subparsers.add_parser("parser", help="Time parsing enums and structs from dump.cs.")
+    cs_parser.add_argument("dump", help="Path of dump.cs from Il2CppInspector.")
+    cs_parser.add_argument("--against", help="Another lib/compiler.py whose CSParser is timed and checked for the same result.")
+    cs_parser.add_argument("--repeat", type=int, default=3)
+    cs_parser.set_defaults(func=bench_parser)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
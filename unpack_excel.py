@@ -1,16 +1,17 @@
 import json
-import shutil
+import os
 import sys
-import tempfile
 import zipfile
 from argparse import ArgumentParser
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 import importlib
 
 from xtractor.table import TableExtractor
 from utils.database import TableDatabase
+from utils.util import ZipCryptoReader, ZipUtils
 from lib.encryption import zip_password
+from lib.flatbuffer import json_default
 from extractor import TableExtractorImpl
 
 def parse_args():
@@ -22,18 +23,25 @@ def parse_args():
     p.add_argument("config_file", type=Path)
     p.add_argument("output_folder", type=Path)
     p.add_argument("threads", type=int, default=10)
+    p.add_argument("--projection", action="store_true", help="Only decode the tables and fields listed in config_file.")
+    p.add_argument("--processes", action="store_true", help="Decode Excel.zip tables in a pool of threads processes instead of threads.")
     return p.parse_args()
 
+def load_projection(config_file):
+    with open(config_file, "r", encoding="utf8") as f:
+        config = json.load(f)
+    return {**config.get("DBSchema", {}), **config.get("ExcelTable", {})}
+
 def process_table(table, output_dir):
     out_file = output_dir / f"{table.name.replace('DBSchema', 'Excel')}.json"
     with out_file.open("wt", encoding="utf8") as f:
-        json.dump(TableDatabase.convert_to_list_dict(table), f, ensure_ascii=False, indent=2)
+        json.dump(TableDatabase.convert_to_list_dict(table), f, ensure_ascii=False, indent=2, default=json_default)
 
-def process_excel_db(db_path, output_folder, flat_data_module_name, threads):
+def process_excel_db(db_path, output_folder, flat_data_module_name, threads, projection=None):
     db_schema_dir = output_folder / "DBSchema"
     db_schema_dir.mkdir(parents=True, exist_ok=True)
 
-    extractor = TableExtractor(str(db_path), str(db_schema_dir), flat_data_module_name)
+    extractor = TableExtractor(str(db_path), str(db_schema_dir), flat_data_module_name, projection=projection)
     db_tables = extractor._process_db_file(str(db_path.resolve()))
 
     with ThreadPoolExecutor(max_workers=threads) as executor:
@@ -41,33 +49,66 @@ def process_excel_db(db_path, output_folder, flat_data_module_name, threads):
         for future in futures:
             future.result()
 
-def process_excel_table(zip_path, output_folder, flat_data_module_name, threads):
+def process_excel_member(file_name, file_data, extractor, excel_table_dir):
+    data, name, success = extractor._process_zip_file(file_name, file_data)
+    if success and data:
+        with (excel_table_dir / name).open("wb") as f:
+            f.write(data)
+
+_worker_extractor = None
+_worker_reader = None
+_worker_output_dir = None
+
+def init_excel_worker(zip_path, excel_table_dir, flat_data_module_name, projection):
+    """Import FlatData and open Excel.zip once per worker process."""
+    global _worker_extractor, _worker_reader, _worker_output_dir
+    _worker_extractor = TableExtractor(str(zip_path.parent), str(excel_table_dir), flat_data_module_name, projection=projection)
+    _worker_reader = ZipCryptoReader(str(zip_path), zip_password("Excel.zip"))
+    _worker_output_dir = excel_table_dir
+
+def process_excel_worker_member(file_name):
+    # The worker writes the JSON itself, only the name goes back to the parent.
+    process_excel_member(file_name, _worker_reader.read(file_name), _worker_extractor, _worker_output_dir)
+    return file_name
+
+def process_excel_table(zip_path, output_folder, flat_data_module_name, threads, projection=None, processes=False):
     excel_table_dir = output_folder / "ExcelTable"
     excel_table_dir.mkdir(parents=True, exist_ok=True)
-    temp_dir = Path(tempfile.mkdtemp())
-    try:
-        password = zip_password("Excel.zip")
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(temp_dir, pwd=password)
-
-        extractor = TableExtractor(str(temp_dir), str(excel_table_dir), flat_data_module_name)
-
-        with ThreadPoolExecutor(max_workers=threads) as executor:
-            futures = []
-            for file_path in temp_dir.glob("*.bytes"):
-                file_name = file_path.name
-                with file_path.open("rb") as f:
-                    file_data = f.read()
-                futures.append(executor.submit(extractor._process_zip_file, file_name, file_data))
-
-            for future in futures:
-                data, name, success = future.result()
-                if success and data:
-                    out_file = excel_table_dir / name
-                    with out_file.open("wb") as f:
-                        f.write(data)
-    finally:
-        shutil.rmtree(temp_dir)
+
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        infos = [info for info in zip_ref.infolist() if info.filename.endswith(".bytes") and "/" not in info.filename]
+    if projection is not None:
+        wanted = {f"{name.removesuffix('.json').lower()}.bytes" for name in projection}
+        infos = [info for info in infos if info.filename.lower() in wanted]
+    # Largest first, so a big table does not start last and keep one worker busy alone.
+    names = [info.filename for info in sorted(infos, key=lambda info: info.compress_size, reverse=True)]
+
+    if processes:
+        with ProcessPoolExecutor(
+            threads,
+            initializer=init_excel_worker,
+            initargs=(zip_path, excel_table_dir, flat_data_module_name, projection),
+        ) as executor:
+            for _ in executor.map(process_excel_worker_member, names):
+                pass
+        return
+
+    extractor = TableExtractor(str(zip_path.parent), str(excel_table_dir), flat_data_module_name, projection=projection)
+    # Members are decrypted by processes and arrive in order, at most two per worker
+    # wait in memory for a decoding thread. Nothing is extracted to disk.
+    members = ZipUtils.read_members(
+        str(zip_path), zip_password("Excel.zip"), names, workers=min(threads, os.cpu_count() or 1)
+    )
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        pending = set()
+        for name, data in members:
+            if len(pending) >= 2 * threads:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            pending.add(executor.submit(process_excel_member, name, data, extractor, excel_table_dir))
+        for future in pending:
+            future.result()
 
 def main():
     args = parse_args()
@@ -76,8 +117,10 @@ def main():
 
     flat_data_module_name = ".".join(args.flatbuffers_dir.parts).lstrip(".")
 
-    process_excel_db(args.db_path, args.output_folder, flat_data_module_name, args.threads)
-    process_excel_table(args.zip_path, args.output_folder, flat_data_module_name, args.threads)
+    projection = load_projection(args.config_file) if args.projection else None
+
+    process_excel_db(args.db_path, args.output_folder, flat_data_module_name, args.threads, projection)
+    process_excel_table(args.zip_path, args.output_folder, flat_data_module_name, args.threads, projection, args.processes)
 
 if __name__ == "__main__":
     main()
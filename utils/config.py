@@ -3,4 +3,8 @@ class Config:
     max_threads = threads * 7
     is_cn = False
     proxy = None
-    retries = 5
\ No newline at end of file
+    retries = 5
+    keystream_cache_dir = "Extracted/Keystream"  # Empty to keep keystreams in memory only.
+    keystream_cache_memory = 256 * 1024 * 1024
+    string_cache_size = 1 << 18
+    intern_strings = False
@@ -1,15 +1,20 @@
-from concurrent.futures import ThreadPoolExecutor
-from typing import Any, Callable, Generator, Iterable, Literal, Protocol
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Generator, Iterable, Iterator, Literal, Protocol
 from queue import Queue
 from threading import Thread, Lock, Event
 from time import sleep
+import time
 from keyword import kwlist
 import UnityPy
-from zipfile import ZipFile
+from zipfile import ZIP_DEFLATED, ZIP_STORED, BadZipFile, ZipFile, ZipInfo
 from UnityPy.files.File import ObjectReader
 from lib.console import ProgressBar, notice
+from lib.encryption import ZipCrypto
 import os
+import struct
 import subprocess
+import zlib
 
 class TemplateString:
     """
@@ -165,7 +170,361 @@ class TaskManager:
         """Finish thread pool manually."""
         self.__exit__(None, None, None)
 
+class ZipCryptoReader:
+    LOCAL_HEADER = struct.Struct("<4s5H3I2H")
+    ENCRYPTION_HEADER_SIZE = 12
+
+    def __init__(self, zip_path: str, password: bytes = bytes()) -> None:
+        """Read members of a zip, decrypting ZipCrypto with lib.encryption.ZipCrypto.
+
+        A reader keeps one file handle, use one reader per thread or process.
+
+        Args:
+            zip_path (str): Path of the zip.
+            password (bytes, optional): Password of encrypted members. Defaults to bytes().
+        """
+        with ZipFile(zip_path, "r") as z:
+            self.infos = {info.filename: info for info in z.infolist()}
+        self.password = password
+        self.file = open(zip_path, "rb")
+
+    def __enter__(self) -> "ZipCryptoReader":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def namelist(self) -> list[str]:
+        return list(self.infos)
+
+    def open(self, name: str, chunk_size: int = 1 << 20) -> Iterator[bytes]:
+        """Decrypt and decompress a member as a stream of chunks.
+
+        Args:
+            name (str): Member name.
+            chunk_size (int, optional): Compressed bytes read at a time. Defaults to 1MB.
+
+        Yields:
+            bytes: Decompressed chunks. The CRC is checked after the last one.
+        """
+        info = self.infos[name]
+        if info.compress_type not in (ZIP_STORED, ZIP_DEFLATED):
+            raise NotImplementedError(f"Compression type {info.compress_type} of {name} is not supported.")
+
+        self.file.seek(info.header_offset)
+        header = self.LOCAL_HEADER.unpack(self.file.read(self.LOCAL_HEADER.size))
+        if header[0] != b"PK\x03\x04":
+            raise BadZipFile(f"Bad local file header of {name}.")
+        position = info.header_offset + self.LOCAL_HEADER.size + header[9] + header[10]
+        remaining = info.compress_size
+
+        crypto = None
+        if info.flag_bits & 0x1:
+            crypto = ZipCrypto(self.password)
+            self.file.seek(position)
+            encryption_header = crypto.decrypt(self.file.read(self.ENCRYPTION_HEADER_SIZE))
+            position += self.ENCRYPTION_HEADER_SIZE
+            remaining -= self.ENCRYPTION_HEADER_SIZE
+            if encryption_header[-1] != self.__check_byte(info):
+                raise RuntimeError(f"Bad password for file {name}.")
+
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS) if info.compress_type == ZIP_DEFLATED else None
+        crc = 0
+        while remaining > 0:
+            # Seek every time, several members may be streamed at once.
+            self.file.seek(position)
+            chunk = self.file.read(min(chunk_size, remaining))
+            if not chunk:
+                raise BadZipFile(f"Truncated data of {name}.")
+            position += len(chunk)
+            remaining -= len(chunk)
+            if crypto:
+                chunk = crypto.decrypt(chunk)
+            if decompressor:
+                chunk = decompressor.decompress(chunk)
+            crc = zlib.crc32(chunk, crc)
+            yield bytes(chunk)
+        if decompressor and (tail := decompressor.flush()):
+            crc = zlib.crc32(tail, crc)
+            yield tail
+        if crc != info.CRC:
+            raise BadZipFile(f"Bad CRC-32 for file {name}.")
+
+    def read(self, name: str) -> bytes:
+        """Read a whole member."""
+        return b"".join(self.open(name))
+
+    def read_raw(self, name: str) -> bytes:
+        """Read a member as stored, from its local header to the end of its data descriptor if any."""
+        info = self.infos[name]
+        self.file.seek(info.header_offset)
+        header = self.file.read(self.LOCAL_HEADER.size)
+        size = self.LOCAL_HEADER.size + header[26] + (header[27] << 8) + header[28] + (header[29] << 8)
+        size += info.compress_size
+        if info.flag_bits & 0x8:
+            self.file.seek(info.header_offset + size)
+            size += 16 if self.file.read(4) == b"PK\x07\x08" else 12
+        self.file.seek(info.header_offset)
+        return self.file.read(size)
+
+    @staticmethod
+    def __check_byte(info: ZipInfo) -> int:
+        # With a data descriptor the CRC is unknown when encrypting, the DOS time is checked instead.
+        if info.flag_bits & 0x8:
+            hour, minute, second = info.date_time[3:]
+            return ((hour << 11) | (minute << 5) | (second // 2)) >> 8
+        return info.CRC >> 24
+
+
+class ZipCryptoWriter:
+    LOCAL_HEADER = ZipCryptoReader.LOCAL_HEADER
+    CENTRAL_HEADER = struct.Struct("<4s6H3I5H2I")
+    END_OF_CENTRAL_DIRECTORY = struct.Struct("<4s4H2IH")
+
+    def __init__(self, zip_path: str) -> None:
+        """Write a zip from members copied raw from another zip or made by compress_zip_member.
+
+        Args:
+            zip_path (str): Path of the new zip.
+        """
+        self.zip_path = zip_path
+        self.file = open(zip_path, "wb")
+        self.entries: list[tuple[ZipInfo, int]] = []
+
+    def __enter__(self) -> "ZipCryptoWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        # An incomplete zip is removed, whether the error came from the block or from close.
+        if exc_type is not None:
+            self.discard()
+            return
+        try:
+            self.close()
+        except BaseException:
+            self.discard()
+            raise
+
+    def copy_member(self, reader: ZipCryptoReader, name: str) -> None:
+        """Copy a member as stored, still compressed and encrypted."""
+        self.entries.append((reader.infos[name], self.file.tell()))
+        self.file.write(reader.read_raw(name))
+
+    def write_member(self, info: ZipInfo, payload: bytes) -> None:
+        """Write a member compressed and encrypted by compress_zip_member."""
+        self.entries.append((info, self.file.tell()))
+        self.file.write(self.__local_header(info))
+        self.file.write(payload)
+
+    def discard(self) -> None:
+        """Close the file and delete the incomplete zip."""
+        self.file.close()
+        if os.path.exists(self.zip_path):
+            os.remove(self.zip_path)
+
+    def close(self) -> None:
+        """Write the central directory and close the file."""
+        if self.file.closed:
+            return
+        try:
+            self.__write_central_directory()
+        finally:
+            self.file.close()
+
+    def __write_central_directory(self) -> None:
+        start = self.file.tell()
+        for info, offset in self.entries:
+            name = self.__encoded_name(info)
+            self.file.write(
+                self.CENTRAL_HEADER.pack(
+                    b"PK\x01\x02",
+                    (info.create_system << 8) | info.create_version,
+                    info.extract_version,
+                    info.flag_bits,
+                    info.compress_type,
+                    *self.__dos_time(info),
+                    info.CRC,
+                    info.compress_size,
+                    info.file_size,
+                    len(name),
+                    len(info.extra),
+                    len(info.comment),
+                    0,
+                    info.internal_attr,
+                    info.external_attr,
+                    offset,
+                )
+            )
+            self.file.write(name + info.extra + info.comment)
+        end = self.file.tell()
+        if len(self.entries) > 0xFFFF or end > 0xFFFFFFFF:
+            raise BadZipFile("The zip needs ZIP64, which is not supported.")
+        self.file.write(
+            self.END_OF_CENTRAL_DIRECTORY.pack(
+                b"PK\x05\x06", 0, 0, len(self.entries), len(self.entries), end - start, start, 0
+            )
+        )
+
+    def __local_header(self, info: ZipInfo) -> bytes:
+        name = self.__encoded_name(info)
+        return (
+            self.LOCAL_HEADER.pack(
+                b"PK\x03\x04",
+                info.extract_version,
+                info.flag_bits,
+                info.compress_type,
+                *self.__dos_time(info),
+                info.CRC,
+                info.compress_size,
+                info.file_size,
+                len(name),
+                len(info.extra),
+            )
+            + name
+            + info.extra
+        )
+
+    @staticmethod
+    def __encoded_name(info: ZipInfo) -> bytes:
+        return info.orig_filename.encode("utf8" if info.flag_bits & 0x800 else "cp437")
+
+    @staticmethod
+    def __dos_time(info: ZipInfo) -> tuple[int, int]:
+        year, month, day, hour, minute, second = info.date_time
+        return (hour << 11) | (minute << 5) | (second // 2), ((year - 1980) << 9) | (month << 5) | day
+
+
+def compress_zip_member(
+    name: str, data: bytes, password: bytes, date_time: tuple[int, ...]
+) -> tuple[ZipInfo, bytes]:
+    """Deflate a member at level 9 and encrypt it with ZipCrypto, like "zip -9 -P".
+
+    The member is stored instead when deflate does not make it smaller. Runs in
+    worker processes, the result goes to ZipCryptoWriter.write_member.
+
+    Returns:
+        tuple[ZipInfo, bytes]: Member info and its data following the local header.
+    """
+    info = ZipInfo(name, date_time)
+    if not name.isascii():
+        info.flag_bits |= 0x800
+    info.create_system = 3
+    info.external_attr = 0o100644 << 16
+    info.CRC = zlib.crc32(data)
+    info.file_size = len(data)
+
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+    payload = compressor.compress(data) + compressor.flush()
+    info.compress_type = ZIP_DEFLATED
+    if len(payload) >= len(data):
+        payload = data
+        info.compress_type = ZIP_STORED
+    # Deflate and ZipCrypto both need version 2.0 to extract.
+    info.extract_version = 20 if info.compress_type == ZIP_DEFLATED or password else 10
+
+    if password:
+        info.flag_bits |= 0x1
+        crypto = ZipCrypto(password)
+        # The last byte of the random header lets readers check the password.
+        payload = crypto.encrypt(os.urandom(11) + bytes((info.CRC >> 24,)) + payload)
+    info.compress_size = len(payload)
+    return info, bytes(payload)
+
+
+_zip_worker_reader: ZipCryptoReader | None = None
+
+
+def _open_zip_worker_reader(zip_path: str, password: bytes) -> None:
+    global _zip_worker_reader
+    _zip_worker_reader = ZipCryptoReader(zip_path, password)
+
+
+def _read_zip_worker_member(name: str) -> bytes:
+    return _zip_worker_reader.read(name)
+
+
 class ZipUtils:
+    @staticmethod
+    def read_members(
+        zip_path: str,
+        password: bytes = bytes(),
+        names: Iterable[str] | None = None,
+        workers: int = 1,
+    ) -> Iterator[tuple[str, bytes]]:
+        """Read members of a zip with ZipCryptoReader, in order.
+
+        Args:
+            zip_path (str): Path of the zip.
+            password (bytes, optional): Password of encrypted members. Defaults to bytes().
+            names (Iterable[str] | None, optional): Members to read. Defaults to every file.
+            workers (int, optional): Processes decrypting members in parallel, each opens the zip once. Defaults to 1.
+
+        Yields:
+            tuple[str, bytes]: Member name and its data.
+        """
+        with ZipCryptoReader(zip_path, password) as reader:
+            if names is None:
+                names = [name for name, info in reader.infos.items() if not info.is_dir()]
+            names = list(names)
+            if workers <= 1 or len(names) <= 1:
+                for name in names:
+                    yield name, reader.read(name)
+                return
+
+        with ProcessPoolExecutor(
+            workers, initializer=_open_zip_worker_reader, initargs=(zip_path, password)
+        ) as executor:
+            # Stay at most two members per worker ahead of the consumer.
+            pending = deque()
+            for name in names:
+                if len(pending) >= 2 * workers:
+                    done_name, future = pending.popleft()
+                    yield done_name, future.result()
+                pending.append((name, executor.submit(_read_zip_worker_member, name)))
+            while pending:
+                done_name, future = pending.popleft()
+                yield done_name, future.result()
+
+    @staticmethod
+    def rebuild_zip(
+        source_path: str,
+        target_path: str,
+        replacements: dict[str, bytes],
+        password: bytes = bytes(),
+        workers: int = 1,
+    ) -> None:
+        """Write a copy of a zip with some members replaced.
+
+        Unchanged members are copied raw, without decompressing or decrypting them.
+        Replaced members are compressed and encrypted by compress_zip_member in a
+        process pool. target_path may be source_path, the zip is replaced when done.
+
+        Args:
+            source_path (str): Path of the source zip.
+            target_path (str): Path of the new zip.
+            replacements (dict[str, bytes]): New data by member name, names not in the source are appended.
+            password (bytes, optional): Password to encrypt replaced members with. Defaults to bytes().
+            workers (int, optional): Processes compressing replaced members. Defaults to 1.
+        """
+        date_time = time.localtime()[:6]
+        temp_path = f"{target_path}.tmp"
+        with ZipCryptoReader(source_path, password) as reader:
+            names = reader.namelist() + [name for name in replacements if name not in reader.infos]
+            with ProcessPoolExecutor(max(1, workers)) as executor, ZipCryptoWriter(temp_path) as writer:
+                futures = {
+                    name: executor.submit(compress_zip_member, name, data, password, date_time)
+                    for name, data in replacements.items()
+                }
+                for name in names:
+                    if name in futures:
+                        writer.write_member(*futures[name].result())
+                    else:
+                        writer.copy_member(reader, name)
+        os.replace(temp_path, target_path)
+
     @staticmethod
     def extract_zip(
         zip_path: str | list[str],
@@ -0,0 +1,230 @@
+"""Decode whole tables column by column into NumPy arrays.
+
+Each field is read for every record at once: record positions, their vtables and
+field offsets are gathered with NumPy indexing instead of a Python loop per record.
+Scalars become typed arrays, strings a pool of UTF-8 data with offsets and enums
+their integer codes with a name table. A decoded table is saved as a folder of .npy
+files that later tools open memory-mapped, without parsing JSON records.
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+from os import path
+
+import numpy as np
+
+from lib.encryption import convert_string, create_key
+from lib.flatbuffer import UOFFSET, read_tables, read_vtable
+from xtractor.schema import ARRAY_CONVERTERS, SchemaDecoder
+
+META_NAME = "meta.json"
+
+SCALAR_DTYPES = {data_type: dtype for data_type, (_, dtype) in ARRAY_CONVERTERS.items()} | {"bool": "?"}
+"""Stored dtype of each scalar type decoded by the schema decoder."""
+
+
+@dataclass
+class StringColumn:
+    """Strings of a column as one UTF-8 pool, row i is data[offsets[i]:offsets[i + 1]]."""
+
+    offsets: np.ndarray
+    data: np.ndarray
+
+    @classmethod
+    def from_strings(cls, values: list[str]) -> "StringColumn":
+        encoded = [value.encode("utf8") for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return cls(offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return self.data[self.offsets[index] : self.offsets[index + 1]].tobytes().decode("utf8")
+
+    def tolist(self) -> list[str]:
+        data = self.data.tobytes()
+        bounds = self.offsets.tolist()
+        return [data[start:end].decode("utf8") for start, end in zip(bounds, bounds[1:])]
+
+
+@dataclass
+class EnumColumn:
+    """Enum values of a column as integer codes, names maps each code to its member."""
+
+    codes: np.ndarray
+    enum: str
+    names: dict[int, str]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> str:
+        return self.names[int(self.codes[index])]
+
+    def tolist(self) -> list[str]:
+        names = self.names
+        return [names[code] for code in self.codes.tolist()]
+
+
+Column = np.ndarray | StringColumn | EnumColumn
+
+
+@dataclass
+class ColumnarTable:
+    """Columns of a table, one entry per record in each.
+
+    Fields that are lists or nested structs have no column and are named in skipped.
+    """
+
+    name: str
+    rows: int
+    columns: dict[str, Column] = field(default_factory=dict)
+    skipped: list[str] = field(default_factory=list)
+
+    def save(self, folder: str) -> None:
+        """Save the table as .npy files and meta.json in folder.
+
+        Scalar and enum columns are saved as "<column>.npy", string columns as
+        "<column>.offsets.npy" and "<column>.data.npy".
+        """
+        os.makedirs(folder, exist_ok=True)
+        columns = {}
+        for name, column in self.columns.items():
+            if isinstance(column, StringColumn):
+                np.save(path.join(folder, f"{name}.offsets.npy"), column.offsets)
+                np.save(path.join(folder, f"{name}.data.npy"), column.data)
+                columns[name] = {"kind": "string"}
+            elif isinstance(column, EnumColumn):
+                np.save(path.join(folder, f"{name}.npy"), column.codes)
+                columns[name] = {
+                    "kind": "enum",
+                    "enum": column.enum,
+                    "names": {str(value): member for value, member in column.names.items()},
+                }
+            else:
+                np.save(path.join(folder, f"{name}.npy"), column)
+                columns[name] = {"kind": "scalar"}
+
+        with open(path.join(folder, META_NAME), "wt", encoding="utf8") as file:
+            json.dump(
+                {"table": self.name, "rows": self.rows, "columns": columns, "skipped": self.skipped},
+                file,
+                indent=4,
+                ensure_ascii=False,
+            )
+
+    @classmethod
+    def load(cls, folder: str, mmap: bool = True) -> "ColumnarTable":
+        """Open a table saved by save, its arrays memory-mapped unless mmap is False."""
+        with open(path.join(folder, META_NAME), "rt", encoding="utf8") as file:
+            meta = json.load(file)
+
+        mmap_mode = "r" if mmap else None
+        columns: dict[str, Column] = {}
+        for name, column in meta["columns"].items():
+            if column["kind"] == "string":
+                columns[name] = StringColumn(
+                    np.load(path.join(folder, f"{name}.offsets.npy"), mmap_mode=mmap_mode),
+                    np.load(path.join(folder, f"{name}.data.npy"), mmap_mode=mmap_mode),
+                )
+            elif column["kind"] == "enum":
+                columns[name] = EnumColumn(
+                    np.load(path.join(folder, f"{name}.npy"), mmap_mode=mmap_mode),
+                    column["enum"],
+                    {int(value): member for value, member in column["names"].items()},
+                )
+            else:
+                columns[name] = np.load(path.join(folder, f"{name}.npy"), mmap_mode=mmap_mode)
+        return cls(meta["table"], meta["rows"], columns, meta["skipped"])
+
+    def to_records(self) -> list[dict]:
+        """Rebuild the records of the table from its columns."""
+        if not self.columns:
+            return [{} for _ in range(self.rows)]
+        values = {name: column.tolist() for name, column in self.columns.items()}
+        return [dict(zip(values, row)) for row in zip(*values.values())]
+
+
+def gather(buf: np.ndarray, positions: np.ndarray, dtype: str) -> np.ndarray:
+    """Read one little-endian value of dtype at each absolute position of buf."""
+    dtype = np.dtype(dtype)
+    index = positions[:, None] + np.arange(dtype.itemsize)
+    return buf[index].view(dtype).reshape(-1)
+
+
+def decode_columns(
+    decoder: SchemaDecoder, table_name: str, data, fields: list[str] | None = None
+) -> ColumnarTable:
+    """Decode the records of a decrypted table into columns.
+
+    Args:
+        decoder (SchemaDecoder): Schema of the table.
+        table_name (str): Table struct name, e.g. "ScenarioScriptExcelTable".
+        data (bytes | bytearray | memoryview): Table data after the table-level XOR.
+        fields (list[str] | None, optional): Only decode these fields of each record. Defaults to all.
+
+    Returns:
+        ColumnarTable: Columns holding the same values as the records of SchemaDecoder.decode_table.
+    """
+    table = decoder.tables[table_name]
+    password = create_key(table["key"])
+    pos = UOFFSET.unpack_from(data, 0)[0]
+    (offset,) = read_vtable(data, pos, 1)
+    positions = np.array(read_tables(data, pos + offset) if offset else [], dtype=np.int64)
+
+    buf = np.frombuffer(data, dtype=np.uint8)
+    vtables = positions - gather(buf, positions, "<i4")
+    vtable_sizes = gather(buf, vtables, "<u2")
+
+    result = ColumnarTable(table_name, len(positions))
+    for slot, (name, kind, data_type, is_list) in enumerate(decoder.structs[table["record"]]):
+        if fields is not None and name not in fields:
+            continue
+        if is_list or kind not in ("scalar", "string", "enum"):
+            result.skipped.append(name)
+            continue
+
+        # Fields absent from a record read position 0 and are zeroed after decoding.
+        present = vtable_sizes > 4 + 2 * slot
+        offsets = np.where(present, gather(buf, np.where(present, vtables + 4 + 2 * slot, 0), "<u2"), 0)
+        field_positions = np.where(offsets != 0, positions + offsets, 0)
+
+        if kind == "string":
+            result.columns[name] = __string_column(data, buf, field_positions, offsets, password)
+        elif kind == "enum":
+            enum_type, names = decoder.enums[data_type]
+            if (codes := __scalar_column(buf, field_positions, offsets, enum_type, password)) is not None:
+                result.columns[name] = EnumColumn(codes, data_type, names)
+        elif (column := __scalar_column(buf, field_positions, offsets, data_type, password)) is not None:
+            result.columns[name] = column
+    return result
+
+
+def __scalar_column(
+    buf: np.ndarray, field_positions: np.ndarray, offsets: np.ndarray, data_type: str, password: bytes
+) -> np.ndarray | None:
+    if (dtype := SCALAR_DTYPES.get(data_type)) is None:
+        return None
+    values = gather(buf, field_positions, dtype)
+    values[offsets == 0] = 0
+    if data_type == "bool":
+        return values
+    convert, _ = ARRAY_CONVERTERS[data_type]
+    return convert(values, password)
+
+
+def __string_column(
+    data, buf: np.ndarray, field_positions: np.ndarray, offsets: np.ndarray, password: bytes
+) -> StringColumn:
+    starts = np.where(offsets != 0, field_positions + gather(buf, field_positions, "<u4"), 0)
+    lengths = np.where(offsets != 0, gather(buf, starts, "<u4"), 0)
+    view = memoryview(data)
+    return StringColumn.from_strings(
+        [
+            convert_string(bytes(view[start + 4 : start + 4 + length]) if length else None, password)
+            for start, length in zip(starts.tolist(), lengths.tolist())
+        ]
+    )
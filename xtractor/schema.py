@@ -0,0 +1,232 @@
+"""Decode tables by interpreting the schema written by CompileToPython.create_schema_file.
+
+Nothing is generated or imported per table, a new game version decodes as soon as
+its schema.json exists. Each struct is turned once into a slot plan, a list of field
+readers built from the same primitives as the generated direct decoders, so both
+give the same records.
+"""
+
+import json
+from typing import Any, Callable
+
+from lib.encryption import (
+    NO_MASKS,
+    XorMasks,
+    convert_double_array,
+    convert_double_masked,
+    convert_float_array,
+    convert_float_masked,
+    convert_int_array,
+    convert_long_array,
+    convert_short_array,
+    convert_string,
+    convert_uint_array,
+    convert_ulong_array,
+    convert_ushort_array,
+    create_key,
+)
+from lib.flatbuffer import (
+    UOFFSET,
+    indirect,
+    read_array,
+    read_string,
+    read_strings,
+    read_tables,
+    read_vtable,
+    unpack_bool,
+    unpack_double,
+    unpack_float,
+    unpack_int,
+    unpack_long,
+    unpack_short,
+    unpack_uint,
+    unpack_ulong,
+    unpack_ushort,
+)
+
+Reader = Callable[[Any, int, int, bytes, XorMasks], Any]
+"""Read a field from (buf, pos, offset, password, masks), offset is 0 if absent."""
+
+SlotPlan = tuple[int, list[tuple[str, int, Reader]]]
+"""Vtable size and (name, slot, reader) of each decoded field."""
+
+MASKED_UNPACKERS = {
+    "short": unpack_short,
+    "ushort": unpack_ushort,
+    "int": unpack_int,
+    "uint": unpack_uint,
+    "long": unpack_long,
+    "ulong": unpack_ulong,
+}
+
+MASK_INDEX = {name: XorMasks._fields.index(name) for name in MASKED_UNPACKERS}
+"""Position of each integer mask in XorMasks."""
+
+ARRAY_CONVERTERS = {
+    "short": (convert_short_array, "<i2"),
+    "ushort": (convert_ushort_array, "<u2"),
+    "int": (convert_int_array, "<i4"),
+    "uint": (convert_uint_array, "<u4"),
+    "long": (convert_long_array, "<i8"),
+    "ulong": (convert_ulong_array, "<u8"),
+    "float": (convert_float_array, "<f4"),
+    "double": (convert_double_array, "<f8"),
+}
+
+
+class SchemaDecoder:
+    def __init__(self, schema: dict) -> None:
+        """Decode tables described by a schema.
+
+        Args:
+            schema (dict): Content of schema.json with "enums", "structs" and "tables".
+        """
+        self.enums: dict[str, tuple[str, dict[int, str]]] = {
+            name: (enum["type"], {int(value): member for value, member in enum["names"].items()})
+            for name, enum in schema["enums"].items()
+        }
+        self.structs: dict[str, list[list]] = schema["structs"]
+        self.tables: dict[str, dict[str, str]] = schema["tables"]
+        self.lower_names = {name.lower(): name for name in self.structs}
+
+        self.__plans: dict[tuple[str, tuple[str, ...] | None], SlotPlan] = {}
+        self.__decoders: dict[str, Callable[[Any, int, bytes, XorMasks], dict]] = {}
+
+    @classmethod
+    def load(cls, schema_path: str) -> "SchemaDecoder":
+        """Load the decoder from a schema.json file."""
+        with open(schema_path, "rt", encoding="utf8") as file:
+            return cls(json.load(file))
+
+    def get(self, lower_name: str) -> str | None:
+        """Get struct name by lowercase name, e.g. "scenarioscriptexceltable"."""
+        return self.lower_names.get(lower_name)
+
+    def decode_table(self, table_name: str, data, fields: list[str] | None = None) -> list[dict]:
+        """Decode the records of a decrypted table.
+
+        Args:
+            table_name (str): Table struct name, e.g. "ScenarioScriptExcelTable".
+            data (bytes | bytearray | memoryview): Table data after the table-level XOR.
+            fields (list[str] | None, optional): Only decode these fields of each record. Defaults to all.
+
+        Returns:
+            list[dict]: Records, same as dump_table of the generated dump wrapper.
+        """
+        table = self.tables[table_name]
+        password = create_key(table["key"])
+        masks = XorMasks.from_key(password)
+        pos = UOFFSET.unpack_from(data, 0)[0]
+        (offset,) = read_vtable(data, pos, 1)
+        if not offset:
+            return []
+        decode = self.__decoder(table["record"], tuple(fields) if fields is not None else None)
+        return [decode(data, position, password, masks) for position in read_tables(data, pos + offset)]
+
+    def decode_root(self, struct_name: str, data, password: bytes = b"") -> dict:
+        """Decode the root struct of data, same as dump_<struct_name> of the generated dump wrapper."""
+        masks = XorMasks.from_key(password) if password else NO_MASKS
+        return self.__decoder(struct_name)(data, UOFFSET.unpack_from(data, 0)[0], password, masks)
+
+    def slot_plan(self, struct_name: str, fields: tuple[str, ...] | None = None) -> SlotPlan:
+        """Build the readers of a struct once, only for the given fields if any."""
+        key = (struct_name, fields)
+        if (plan := self.__plans.get(key)) is not None:
+            return plan
+
+        schema_fields = self.structs[struct_name]
+        readers = []
+        for slot, (name, kind, data_type, is_list) in enumerate(schema_fields):
+            if fields is not None and name not in fields:
+                continue
+            if reader := (self.__list_reader if is_list else self.__reader)(kind, data_type):
+                readers.append((name, slot, reader))
+        plan = self.__plans[key] = (len(schema_fields), readers)
+        return plan
+
+    def __decoder(
+        self, struct_name: str, fields: tuple[str, ...] | None = None
+    ) -> Callable[[Any, int, bytes, XorMasks], dict]:
+        if fields is None and (decode := self.__decoders.get(struct_name)):
+            return decode
+
+        size, readers = self.slot_plan(struct_name, fields)
+
+        def decode(buf, pos: int, password: bytes, masks: XorMasks) -> dict:
+            offsets = read_vtable(buf, pos, size)
+            return {name: read(buf, pos, offsets[slot], password, masks) for name, slot, read in readers}
+
+        if fields is None:
+            self.__decoders[struct_name] = decode
+        return decode
+
+    def __nested_decoder(self, struct_name: str) -> Callable[[Any, int, bytes, XorMasks], dict]:
+        # Structs may nest themselves, resolve the decoder when first read.
+        def decode(buf, pos: int, password: bytes, masks: XorMasks) -> dict:
+            return self.__decoder(struct_name)(buf, pos, password, masks)
+
+        return decode
+
+    def __scalar_reader(self, data_type: str) -> Reader | None:
+        if unpack := MASKED_UNPACKERS.get(data_type):
+            index = MASK_INDEX[data_type]
+            return lambda buf, pos, o, password, masks: (
+                (unpack(buf, pos + o)[0] if o else 0) ^ masks[index]
+            )
+        if data_type == "float":
+            return lambda buf, pos, o, password, masks: convert_float_masked(
+                unpack_float(buf, pos + o)[0] if o else 0, masks
+            )
+        if data_type == "double":
+            return lambda buf, pos, o, password, masks: convert_double_masked(
+                unpack_double(buf, pos + o)[0] if o else 0, masks
+            )
+        if data_type == "bool":
+            return lambda buf, pos, o, password, masks: bool(unpack_bool(buf, pos + o)[0] if o else 0)
+        return None
+
+    def __reader(self, kind: str, data_type: str) -> Reader | None:
+        if kind == "scalar":
+            return self.__scalar_reader(data_type)
+        if kind == "string":
+            return lambda buf, pos, o, password, masks: convert_string(
+                read_string(buf, pos + o) if o else None, password
+            )
+        if kind == "struct":
+            decode = self.__nested_decoder(data_type)
+            return lambda buf, pos, o, password, masks: (
+                decode(buf, indirect(buf, pos + o), password, masks) if o else None
+            )
+        if kind == "enum":
+            enum_type, names = self.enums[data_type]
+            if read := self.__scalar_reader(enum_type):
+                return lambda buf, pos, o, password, masks: names[read(buf, pos, o, password, masks)]
+        return None
+
+    def __list_reader(self, kind: str, data_type: str) -> Reader | None:
+        if kind == "string":
+            return lambda buf, pos, o, password, masks: (
+                [convert_string(s, password) for s in read_strings(buf, pos + o)] if o else []
+            )
+        if kind == "struct":
+            decode = self.__nested_decoder(data_type)
+            return lambda buf, pos, o, password, masks: (
+                [decode(buf, p, password, masks) for p in read_tables(buf, pos + o)] if o else []
+            )
+        if kind == "scalar" and data_type == "bool":
+            return lambda buf, pos, o, password, masks: (
+                read_array(buf, pos + o, "?").tolist() if o else []
+            )
+        if kind == "scalar" and data_type in ARRAY_CONVERTERS:
+            convert, dtype = ARRAY_CONVERTERS[data_type]
+            return lambda buf, pos, o, password, masks: convert(
+                read_array(buf, pos + o, dtype) if o else 0, password
+            )
+        if kind == "enum" and self.enums[data_type][0] in ARRAY_CONVERTERS:
+            enum_type, names = self.enums[data_type]
+            convert, dtype = ARRAY_CONVERTERS[enum_type]
+            return lambda buf, pos, o, password, masks: [
+                names[v] for v in convert(read_array(buf, pos + o, dtype) if o else 0, password).tolist()
+            ]
+        return None
+
@@ -1,20 +1,52 @@
 import importlib
 import json
 import os
+import threading
 from os import path
 from types import ModuleType
-from typing import Any
-from zipfile import ZipFile
+from typing import Any, Literal
 
+from lib.compiler import FlatDataBundle
 from lib.console import notice, print
 from lib.encryption import xor_with_key, zip_password
+from lib.flatbuffer import json_default
 from lib.structure import DBTable, SQLiteDataType
 from utils.database import TableDatabase
 from utils.config import Config
+from utils.util import ZipUtils
+from xtractor.columnar import ColumnarTable, decode_columns
+from xtractor.schema import SchemaDecoder
+
+class FlatDataIndex:
+    def __init__(self, flat_data_lib: ModuleType) -> None:
+        """Case-insensitive lookup of FlatData classes, importing a module on first use.
+
+        Args:
+            flat_data_lib (ModuleType): FlatData package.
+        """
+        self.flat_data_lib = flat_data_lib
+        # Packages generated without the lazy index bind every class on import.
+        self.lower_names: dict[str, str] = getattr(flat_data_lib, "LOWER_NAMES", None) or {
+            name.lower(): name for name in flat_data_lib.__dict__
+        }
+
+    def get(self, lower_name: str, default: type | None = None) -> type | None:
+        """Get class by lowercase name, e.g. "scenarioscriptexceltable"."""
+        if (name := self.lower_names.get(lower_name)) is None:
+            return default
+        return getattr(self.flat_data_lib, name, default)
+
 
 class TableExtractor:
     def __init__(
-        self, table_file_folder: str, extract_folder: str, flat_data_module_name: str
+        self,
+        table_file_folder: str,
+        extract_folder: str,
+        flat_data_module_name: str,
+        record_views: bool = False,
+        projection: dict[str, list[str]] | None = None,
+        decoder: Literal["generated", "schema"] = "generated",
+        output_format: Literal["json", "npy"] = "json",
     ) -> None:
         """Extract files in table folder.
 
@@ -22,32 +54,66 @@ class TableExtractor:
             table_file_folder (str): Folder own table files.
             extract_folder (str): Folder to store the extracted data.
             flat_data_module_name (str): Name path to import flat data module. Most like "Extracted.FlatData".
+            record_views (bool, optional): Return table records as lazy views decrypting fields on first access instead of dicts. Defaults to False.
+            projection (dict[str, list[str]] | None, optional): Fields to extract by json file name, e.g. {"ScenarioScriptExcel.json": ["GroupId", "TextJp"]} like "DBSchema" and "ExcelTable" in config.json. Only the listed fields are decrypted and tables not listed are skipped. Defaults to None to extract everything.
+            decoder (str, optional): "generated" decodes with the generated dump wrapper, "schema" interprets schema.json of FlatData without importing generated code, records are always dicts. Defaults to "generated".
+            output_format (str, optional): "npy" saves each table of a zip as a folder of memory-mappable .npy columns decoded with schema.json, see xtractor.columnar. Files that are not tables are still saved as json. Defaults to "json".
         """
         self.table_file_folder = table_file_folder
         self.extract_folder = extract_folder
         self.flat_data_module_name = flat_data_module_name
+        self.record_views = record_views
+        self.projection = projection
+        self.output_format = output_format
 
-        self.lower_fb_name_modules: dict[str, type] = {}
+        self.lower_fb_name_modules: FlatDataIndex | dict[str, type] = {}
         self.dump_wrapper_lib: ModuleType
+        self.schema_decoder: SchemaDecoder | None = None
+        self.__buffers = threading.local()
 
-        self.__import_modules()
+        if decoder == "schema" or output_format == "npy":
+            self.__load_schema()
+        if decoder != "schema":
+            self.__import_modules()
 
     def __import_modules(self):
         try:
+            FlatDataBundle.load(
+                self.flat_data_module_name.rpartition(".")[0].replace(".", os.sep)
+            )
             flat_data_lib = importlib.import_module(self.flat_data_module_name)
             self.dump_wrapper_lib = importlib.import_module(
                 f"{self.flat_data_module_name}.dump_wrapper"
             )
-            self.lower_fb_name_modules = {
-            t_name.lower(): t_class
-            for t_name, t_class in flat_data_lib.__dict__.items()
-            }
+            self.lower_fb_name_modules = FlatDataIndex(flat_data_lib)
         except Exception as e:
             notice(
                 f"Cannot import FlatData module. Make sure FlatData is available in Extracted folder. {e}",
                 "error",
             )
 
+    def __load_schema(self):
+        # Read the generated sources dir like FlatDataBundle.load, an import may resolve into the bundle zip.
+        schema_path = path.join(self.flat_data_module_name.replace(".", os.sep), "schema.json")
+        try:
+            self.schema_decoder = SchemaDecoder.load(schema_path)
+        except Exception as e:
+            notice(f"Cannot load FlatData schema {schema_path}. {e}", "error")
+
+    def _table_buffer(self, size: int) -> bytearray:
+        """Get the decrypt buffer of current thread, grown to at least size bytes.
+
+        Dumped records only hold decoded values, so the buffer is reused by the
+        next table decoded on the same thread. Scalar vectors are decrypted into
+        new arrays since tables always have a key. Record views are not decoded into it.
+        """
+        buffer = getattr(self.__buffers, "data", None)
+        if buffer is None or len(buffer) < size:
+            # Never resize in place, a view from the last table may still be alive.
+            buffer = bytearray(max(size, 2 * len(buffer) if buffer else 0))
+            self.__buffers.data = buffer
+        return buffer
+
     def _process_bytes_file(
         self, file_name: str, data: bytes
     ) -> tuple[dict[str, Any], str]:
@@ -60,6 +126,9 @@ class TableExtractor:
         Returns:
             tuple[dict[str, Any], str]: Tuple with extracted dict and file name. Always have file name if success extract.
         """
+        if self.schema_decoder is not None:
+            return self.__process_bytes_with_schema(file_name, data, self.schema_decoder)
+
         if not (
             flatbuffer_class := self.lower_fb_name_modules.get(
                 file_name.removesuffix(".bytes").lower(), None
@@ -67,28 +136,122 @@ class TableExtractor:
         ):
             return {}, ""
 
+        fields = None
+        if self.projection is not None and (
+            fields := self.projection.get(f"{flatbuffer_class.__name__}.json")
+        ) is None:
+            return {}, ""
+
         obj = None
         try:
             if flatbuffer_class.__name__.endswith("Table"):
                 try:
                     if not file_name.endswith(".bytes") or not Config.is_cn: # CN does not encrypt its Excel.zip (but does encrypt tables in sqlite3 databases such as ExcelDB.db)
-                        data = xor_with_key(flatbuffer_class.__name__, data)
+                        data = xor_with_key(
+                            flatbuffer_class.__name__,
+                            data,
+                            # Views read the data later, so they cannot share the thread buffer.
+                            None if self.record_views else self._table_buffer(len(data)),
+                        )
                     flat_buffer = getattr(flatbuffer_class, "GetRootAs")(data)
-                    obj = getattr(self.dump_wrapper_lib, "dump_table")(flat_buffer)
+                    if fields is not None:
+                        obj = self.__project(
+                            self.dump_wrapper_lib.view_table(flat_buffer), fields
+                        )
+                    else:
+                        obj = getattr(
+                            self.dump_wrapper_lib,
+                            "view_table" if self.record_views else "dump_table",
+                        )(flat_buffer)
                 except:
                     pass
 
             if not obj:
                 flat_buffer = getattr(flatbuffer_class, "GetRootAs")(data)
-                obj = getattr(
-                    self.dump_wrapper_lib, f"dump_{flatbuffer_class.__name__}"
-                )(flat_buffer)
+                if fields is not None and not flatbuffer_class.__name__.endswith("Table"):
+                    obj = self.__project(
+                        [self.dump_wrapper_lib.view_record(flat_buffer)], fields
+                    )[0]
+                else:
+                    obj = getattr(
+                        self.dump_wrapper_lib, f"dump_{flatbuffer_class.__name__}"
+                    )(flat_buffer)
             return (obj, f"{flatbuffer_class.__name__}.json")
         except:
             # if json_data := self.__process_json_file(file_name, data):
             #     return json.loads(json_data), f"{file_name}.json"
             return {}, ""
 
+    def __process_bytes_with_schema(
+        self, file_name: str, data: bytes, schema_decoder: SchemaDecoder
+    ) -> tuple[dict[str, Any], str]:
+        """Same as _process_bytes_file, decoding with the schema instead of generated code."""
+        if not (struct_name := schema_decoder.get(file_name.removesuffix(".bytes").lower())):
+            return {}, ""
+
+        fields = None
+        if self.projection is not None and (
+            fields := self.projection.get(f"{struct_name}.json")
+        ) is None:
+            return {}, ""
+
+        obj = None
+        try:
+            if struct_name.endswith("Table"):
+                try:
+                    if not file_name.endswith(".bytes") or not Config.is_cn:
+                        data = xor_with_key(struct_name, data, self._table_buffer(len(data)))
+                    obj = schema_decoder.decode_table(struct_name, data, fields)
+                except:
+                    pass
+
+            if not obj:
+                obj = schema_decoder.decode_root(struct_name, data)
+                if fields is not None and not struct_name.endswith("Table"):
+                    obj = {name: obj[name] for name in fields if name in obj}
+            return (obj, f"{struct_name}.json")
+        except:
+            return {}, ""
+
+    def _process_bytes_columnar(
+        self, file_name: str, data: bytes
+    ) -> tuple[ColumnarTable | None, str]:
+        """Decode a table bytes file into columns.
+
+        Args:
+            file_name (str): Schema name of data.
+            data (bytes): Flatbuffer data to decode.
+
+        Returns:
+            tuple[ColumnarTable | None, str]: Columns and table name, None if data is not a table of the schema.
+        """
+        if self.schema_decoder is None or not (
+            struct_name := self.schema_decoder.get(file_name.removesuffix(".bytes").lower())
+        ):
+            return None, ""
+        if struct_name not in self.schema_decoder.tables:
+            return None, ""
+
+        fields = None
+        if self.projection is not None and (
+            fields := self.projection.get(f"{struct_name}.json")
+        ) is None:
+            return None, ""
+
+        try:
+            if not file_name.endswith(".bytes") or not Config.is_cn:
+                data = xor_with_key(struct_name, data, self._table_buffer(len(data)))
+            return decode_columns(self.schema_decoder, struct_name, data, fields), struct_name
+        except Exception:
+            return None, ""
+
+    def __project(self, records: list, fields: list[str]) -> list[dict[str, Any]]:
+        """Decode the listed fields of record views, skipping fields not in the schema."""
+        if not records:
+            return []
+        fields = [name for name in fields if name in records[0].FIELDS]
+        return [{name: getattr(record, name) for name in fields} for record in records]
+
     def _process_json_file(self, data: bytes) -> bytes:
         """Extract json file in zip.
 
@@ -121,6 +284,11 @@ class TableExtractor:
             table_list = [table_name] if table_name else db.get_table_list()
 
             for table in table_list:
+                if (
+                    self.projection is not None
+                    and f"{table.replace('DBSchema', 'Excel')}.json" not in self.projection
+                ):
+                    continue
                 columns = db.get_table_column_structure(table)
                 rows: list[tuple] = db.get_table_data(table)[1]
                 table_data = []
@@ -158,11 +326,17 @@ class TableExtractor:
             b_data = self._process_bytes_file(file_name, file_data)
             file_dict, file_name = b_data
             if file_name:
-                return (
-                    json.dumps(file_dict, indent=4, ensure_ascii=False).encode("utf8"),
-                    file_name,
-                    True,
-                )
+                try:
+                    return (
+                        json.dumps(
+                            file_dict, indent=4, ensure_ascii=False, default=json_default
+                        ).encode("utf8"),
+                        file_name,
+                        True,
+                    )
+                except Exception:
+                    # Record views decode on serialization, a broken table fails here and is skipped alone.
+                    pass
         return data, "", False
 
     def extract_db_file(self, file_path: str) -> bool:
@@ -185,6 +359,7 @@ class TableExtractor:
                             f,
                             indent=4,
                             ensure_ascii=False,
+                            default=json_default,
                         )
                 return True
             return False
@@ -201,38 +376,46 @@ class TableExtractor:
             os.makedirs(zip_extract_folder, exist_ok=True)
 
             password = zip_password(path.basename(file_name))
-            with ZipFile(path.join(self.table_file_folder, file_name), "r") as zip:
-                zip.setpassword(password)
-                for item_name in zip.namelist():
-                    item_data = zip.read(item_name)
-
-                    data, name, success = bytes(), "", False
-                    if item_name.endswith((".json", ".bytes")):
-                        if "RootMotion" in file_name:
-                            data, name, success = self._process_zip_file(
-                                f"{file_name.removesuffix('.zip')}Flat", item_data, True
-                            )
-                            name = item_name
-                        else:
-                            data, name, success = self._process_zip_file(
-                                item_name, item_data
-                            )
+            for item_name, item_data in ZipUtils.read_members(
+                path.join(self.table_file_folder, file_name), password
+            ):
+                if (
+                    self.output_format == "npy"
+                    and item_name.endswith(".bytes")
+                    and "RootMotion" not in file_name
+                ):
+                    table, name = self._process_bytes_columnar(item_name, item_data)
+                    if table is not None:
+                        table.save(path.join(zip_extract_folder, name))
+                        continue
 
-                    if not success:
+                data, name, success = bytes(), "", False
+                if item_name.endswith((".json", ".bytes")):
+                    if "RootMotion" in file_name:
                         data, name, success = self._process_zip_file(
-                            item_name, item_data, True
+                            f"{file_name.removesuffix('.zip')}Flat", item_data, True
                         )
-                    if success:
-                        item_name = name if name else item_name
-                        item_data = data
+                        name = item_name
                     else:
-                        notice(
-                            f"The file {item_name} in {file_name} is not be implementate or cannot process."
+                        data, name, success = self._process_zip_file(
+                            item_name, item_data
                         )
-                        continue
 
-                    with open(path.join(zip_extract_folder, item_name), "wb") as f:
-                        f.write(item_data)
+                if not success:
+                    data, name, success = self._process_zip_file(
+                        item_name, item_data, True
+                    )
+                if success:
+                    item_name = name if name else item_name
+                    item_data = data
+                else:
+                    notice(
+                        f"The file {item_name} in {file_name} is not be implementate or cannot process."
+                    )
+                    continue
+
+                with open(path.join(zip_extract_folder, item_name), "wb") as f:
+                    f.write(item_data)
         except Exception as e:
             notice(f"Error when process {file_name}: {e}")
 